@@ -0,0 +1,171 @@
+import multiprocessing as mp
+import queue
+import time
+
+import numpy as np
+
+from numpy_policy import NumpyPolicy
+
+
+def _actor_loop(worker_id, env, action_size, action_branches, weight_queue, transition_queue, stop_event, seed):
+    """Worker process: play episodes with the latest synced policy and ship them to the learner.
+
+    seed is an np.random.SeedSequence; the per-episode market seeds and the
+    actor's exploration get independent streams from it. Each episode
+    reports the seed its market was reset with, so the learner can replay
+    the same market with a baseline.
+    """
+    env_seed, explore_seed = seed.spawn(2)
+    market_seeds = np.random.default_rng(env_seed)
+    rng = np.random.default_rng(explore_seed)
+    policy, epsilon = None, 1.0
+    steps = env.time_periods
+    states = np.empty((steps, env.state_size), dtype=np.float32)
+    next_states = np.empty_like(states)
+    actions = np.empty((steps, action_branches) if action_branches else steps, dtype=np.int64)
+    rewards = np.empty(steps, dtype=np.float32)
+    dones = np.empty(steps, dtype=np.float32)
+
+    while not stop_event.is_set():
+        # Keep only the newest policy the learner has published
+        try:
+            while True:
+                weights, epsilon = weight_queue.get(block=policy is None, timeout=1.0)
+                policy = NumpyPolicy(weights, action_size, action_branches)
+        except queue.Empty:
+            if policy is None:
+                continue
+
+        episode_seed = int(market_seeds.integers(2**32))
+        state = env.reset(seed=episode_seed)
+        done = False
+        t = 0
+        while not done:
+            if rng.random() < epsilon:
+                action = rng.integers(action_size, size=action_branches) if action_branches \
+                    else rng.integers(action_size)
+            else:
+                action = policy.act(state)
+            next_state, reward, done, _ = env.step(action)
+            states[t], actions[t], rewards[t], next_states[t], dones[t] = state, action, reward, next_state, done
+            state = next_state
+            t += 1
+
+        transition_queue.put({
+            'worker': worker_id,
+            'seed': episode_seed,
+            'states': states[:t].copy(),
+            'actions': actions[:t].copy(),
+            'rewards': rewards[:t].copy(),
+            'next_states': next_states[:t].copy(),
+            'dones': dones[:t].copy(),
+            'total_reward': float(rewards[:t].sum(dtype=np.float64)),
+        })
+
+    # Episodes still buffered at shutdown are dropped rather than blocking exit
+    transition_queue.cancel_join_thread()
+
+
+class ActorLearner:
+    """Actor/learner split of DQN training across processes.
+
+    Each actor process owns a copy of the market and a NumPy copy of the
+    policy (so it never imports TensorFlow), plays whole episodes and
+    streams them back as arrays. The learner, i.e. the calling process,
+    owns the DQNAgent, stores incoming transitions, trains, and publishes
+    fresh weights and epsilon to the actors with sync().
+    """
+
+    def __init__(self, agent, env, num_actors=4, seed=None, queue_size=None):
+        self.agent = agent
+        self.env = env
+        self.num_actors = num_actors
+        # One independent seed sequence per actor
+        self._seeds = np.random.SeedSequence(seed).spawn(num_actors)
+        # Spawned processes start clean instead of forking TensorFlow state
+        self._ctx = mp.get_context('spawn')
+        self._stop_event = self._ctx.Event()
+        self._transitions = self._ctx.Queue(maxsize=queue_size or 4 * num_actors)
+        self._weight_queues = []
+        self._processes = []
+
+    def start(self):
+        """Launch the actor processes with the agent's current policy"""
+        for i in range(self.num_actors):
+            weight_queue = self._ctx.Queue()
+            p = self._ctx.Process(
+                target=_actor_loop,
+                args=(i, self.env, self.agent.action_size, self.agent.action_branches or 0,
+                      weight_queue, self._transitions, self._stop_event, self._seeds[i]),
+                daemon=True
+            )
+            p.start()
+            self._weight_queues.append(weight_queue)
+            self._processes.append(p)
+        self.sync()
+        return self
+
+    def sync(self):
+        """Publish the learner's current weights and epsilon to every actor"""
+        payload = (self.agent.policy_weights(), self.agent.epsilon)
+        for q in self._weight_queues:
+            q.put(payload)
+
+    def collect(self, timeout=300.0):
+        """Store every episode the actors have delivered, waiting for at least one.
+
+        Returns the list of episodes. While waiting, the actor processes are
+        checked every poll; RuntimeError is raised if one has died and
+        TimeoutError if nothing arrives within timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                episodes = [self._transitions.get(timeout=1.0)]
+                break
+            except queue.Empty:
+                dead = [(i, p.exitcode) for i, p in enumerate(self._processes) if not p.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Actor processes exited unexpectedly (worker, exit code): {dead}")
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"No actor episode arrived within {timeout} s")
+        # Take everything else that is already queued, so collection keeps
+        # pace with however many actors are running
+        try:
+            while True:
+                episodes.append(self._transitions.get_nowait())
+        except queue.Empty:
+            pass
+
+        for episode in episodes:
+            self.agent.remember_batch(
+                episode['states'], episode['actions'], episode['rewards'],
+                episode['next_states'], episode['dones']
+            )
+        return episodes
+
+    def stop(self):
+        """Signal the actors to finish and reap the processes"""
+        self._stop_event.set()
+        # Drain so actors blocked on a full queue can exit
+        try:
+            while True:
+                self._transitions.get_nowait()
+        except queue.Empty:
+            pass
+        for p in self._processes:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+        # Unread weight payloads must not keep this process from exiting
+        for q in self._weight_queues:
+            q.cancel_join_thread()
+            q.close()
+        self._processes = []
+        self._weight_queues = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
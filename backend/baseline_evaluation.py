@@ -0,0 +1,65 @@
+import math
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from enhanced_env import VectorMarketEnvironment
+from human_baseline import HumanBaseline
+
+STRATEGIES = ('fixed', 'adaptive', 'time', 'combined')
+
+
+def _run_chunk(env, strategy, seed, episodes):
+    """Worker task: episodes baseline episodes in lockstep on copies of env, their noise drawn from seed"""
+    baseline = HumanBaseline(env, strategy=strategy)
+    vec_env = VectorMarketEnvironment.replicate(env, episodes)
+    return strategy, baseline.run_vector_episode(vec_env, seed=seed).tolist()
+
+
+def summarize(profits, z=1.96):
+    """Mean, sample stddev and normal-approximation confidence interval of episode profits"""
+    profits = np.asarray(profits, dtype=np.float64)
+    n = len(profits)
+    mean = float(profits.mean())
+    std = float(profits.std(ddof=1)) if n > 1 else 0.0
+    half_width = z * std / math.sqrt(n)
+    return {
+        "episodes": n,
+        "mean": mean,
+        "std": std,
+        "ciLow": mean - half_width,
+        "ciHigh": mean + half_width,
+        "min": float(profits.min()),
+        "max": float(profits.max())
+    }
+
+
+def evaluate_baselines(env, strategies=STRATEGIES, num_seeds=200, seed=None, processes=None, chunk_size=50):
+    """Evaluate baseline strategies over many seeded episodes in a process pool.
+
+    The episodes are split into chunks of up to chunk_size; each task runs
+    one chunk in lockstep on a VectorMarketEnvironment of copies of env,
+    reseeded with the chunk's seed. Every strategy sees the same chunk
+    seeds, and hence the same markets, so their results are paired. Each
+    task receives a pickled copy of env, so the caller's environment is
+    never mutated; with processes=1 the chunks run in this process.
+    Returns {strategy: summary} as produced by summarize().
+    """
+    sizes = [min(chunk_size, num_seeds - i) for i in range(0, num_seeds, chunk_size)]
+    seeds = np.random.default_rng(seed).integers(2**32, size=len(sizes)).tolist()
+    tasks = [(env, s, chunk_seed, size) for s in strategies for chunk_seed, size in zip(seeds, sizes)]
+    processes = processes or os.cpu_count() or 1
+
+    profits = {s: [] for s in strategies}
+    if processes == 1:
+        results = [_run_chunk(*task) for task in tasks]
+    else:
+        # Spawned workers start clean instead of forking a TensorFlow-loaded parent
+        with ProcessPoolExecutor(max_workers=processes, mp_context=mp.get_context('spawn')) as pool:
+            results = [future.result() for future in [pool.submit(_run_chunk, *task) for task in tasks]]
+    for strategy, chunk_profits in results:
+        profits[strategy].extend(chunk_profits)
+
+    return {s: summarize(p) for s, p in profits.items()}
@@ -0,0 +1,64 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class DynamicBatcher:
+    """Merge concurrent single requests into batched calls.
+
+    Callers submit one input row at a time from any thread; a worker thread
+    collects the rows that arrive within max_delay seconds of the first one
+    (up to max_batch_size), stacks them and makes a single fn(batch) call,
+    then hands row i of the result back to the i-th caller. Requests that
+    carry several rows are submitted as a block and kept together.
+    """
+
+    def __init__(self, fn, max_batch_size=64, max_delay=0.002):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def submit(self, rows):
+        """Queue a (n, ...) block of rows; returns a Future for fn's n result rows"""
+        future = Future()
+        self._queue.put((np.asarray(rows), future))
+        return future
+
+    def __call__(self, rows, timeout=None):
+        """Submit a block of rows and wait for its results"""
+        return self.submit(rows).result(timeout)
+
+    def _collect(self):
+        """Block for the first request, then gather more until the window closes or the batch is full"""
+        items = [self._queue.get()]
+        size = len(items[0][0])
+        deadline = time.monotonic() + self.max_delay
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            items.append(item)
+            size += len(item[0])
+        return items
+
+    def _worker(self):
+        while True:
+            items = self._collect()
+            try:
+                results = self.fn(np.concatenate([rows for rows, _ in items]))
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for rows, future in items:
+                future.set_result(results[offset:offset + len(rows)])
+                offset += len(rows)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Benchmark the simulator, agent and API hot paths and write the results as JSON.
+
+    python benchmarks.py --output bench.json          # full run
+    python benchmarks.py --quick --only env,baseline  # smaller grids, some suites
+
+Markets, agents and action draws are seeded with --seed, so two runs of the
+same version do the same work; compare the JSON files of two versions to
+spot regressions.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+SUITES = ("env", "act", "replay", "baseline", "api")
+ENV_GRID = {"products": (5, 50, 500), "segments": (3, 10), "competitors": (2, 8)}
+QUICK_ENV_GRID = {"products": (5, 50), "segments": (3,), "competitors": (2,)}
+API_ENDPOINTS = [
+    ("GET", "/api/training_status", None),
+    ("GET", "/api/training_results", None),
+    ("GET", "/api/products", None),
+    ("GET", "/api/customer_segments", None),
+    ("GET", "/api/baseline_comparison", None),
+    ("GET", "/api/price_demand_data", None),
+    ("GET", "/api/time_pricing_data", None),
+    ("GET", "/api/customer_segment_data", None),
+    ("POST", "/api/recommend", {}),
+]
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)-8s %(message)s",
+    datefmt="%H:%M:%S"
+)
+log = logging.getLogger("benchmarks")
+
+
+# ─── Helpers ──────────────────────────────────────────────────────────────────
+def _rate(fn, min_time):
+    """Calls of fn per second, running it for at least min_time seconds"""
+    fn()  # warm up
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls / elapsed
+
+
+def _latencies(fn, calls):
+    """Latency summary in milliseconds over calls timed calls of fn"""
+    fn()  # warm up
+    samples = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+    samples *= 1000
+    return {
+        "calls": calls,
+        "meanMs": float(samples.mean()),
+        "p50Ms": float(np.percentile(samples, 50)),
+        "p90Ms": float(np.percentile(samples, 90)),
+        "p99Ms": float(np.percentile(samples, 99)),
+        "maxMs": float(samples.max()),
+    }
+
+
+def _metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.time(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "tensorflow": getattr(sys.modules.get("tensorflow"), "__version__", None),
+        "platform": platform.platform(),
+        "cpuCount": os.cpu_count(),
+    }
+
+
+# ─── Suites ───────────────────────────────────────────────────────────────────
+def bench_env(args):
+    from enhanced_env import MarketEnvironment
+
+    grid = QUICK_ENV_GRID if args.quick else ENV_GRID
+    results = []
+    for products in grid["products"]:
+        for segments in grid["segments"]:
+            for competitors in grid["competitors"]:
+                env = MarketEnvironment(products, segments, 24, competitors, seed=args.seed)
+                rng = np.random.default_rng(args.seed)
+                actions = rng.integers(env.num_price_levels, size=(env.time_periods, products))
+
+                def episode():
+                    env.reset()
+                    for action in actions:
+                        env.step(action)
+
+                steps = _rate(episode, args.min_time) * env.time_periods
+                results.append({
+                    "products": products, "segments": segments, "competitors": competitors,
+                    "stepsPerSec": steps
+                })
+                log.info(f"env P={products} S={segments} C={competitors}: {steps:,.0f} steps/s")
+    return results
+
+
+def _agent(args):
+    from enhanced_agent import DQNAgent
+    from enhanced_env import MarketEnvironment
+
+    env = MarketEnvironment(seed=args.seed)
+    return env, DQNAgent(env.state_size, env.num_price_levels, action_branches=env.action_branches, seed=args.seed)
+
+
+def bench_act(args):
+    env, agent = _agent(args)
+    state = env.reset()
+    result = _latencies(lambda: agent.act(state, training=False), 50 if args.quick else 300)
+    log.info(f"act: p50 {result['p50Ms']:.2f} ms, p99 {result['p99Ms']:.2f} ms")
+    return result
+
+
+def bench_replay(args):
+    env, agent = _agent(args)
+    state = env.reset()
+    rng = np.random.default_rng(args.seed)
+    for _ in range(agent.batch_size * 10):
+        action = rng.integers(env.num_price_levels, size=env.num_products)
+        next_state, reward, done, _ = env.step(action)
+        agent.remember(state, action, reward, next_state, done)
+        state = env.reset() if done else next_state
+    rate = _rate(agent.replay, args.min_time)
+    log.info(f"replay: {rate:,.1f} updates/s")
+    return {"batchSize": agent.batch_size, "updatesPerSec": rate}
+
+
+def bench_baseline(args):
+    from enhanced_env import MarketEnvironment, VectorMarketEnvironment
+    from human_baseline import HumanBaseline
+
+    num_envs = 16 if args.quick else 64
+    results = {}
+    for strategy in ("fixed", "adaptive", "time", "combined"):
+        env = MarketEnvironment(seed=args.seed)
+        baseline = HumanBaseline(env, strategy=strategy)
+        vec_env = VectorMarketEnvironment.replicate(env, num_envs, seed=args.seed)
+        results[strategy] = {
+            "episodesPerSec": _rate(baseline.run_episode, args.min_time),
+            "vectorEnvs": num_envs,
+            "vectorEpisodesPerSec": num_envs * _rate(lambda: baseline.run_vector_episode(vec_env), args.min_time),
+        }
+        log.info(f"baseline {strategy}: {results[strategy]['episodesPerSec']:,.1f} episodes/s, "
+                 f"{results[strategy]['vectorEpisodesPerSec']:,.1f} episodes/s on {num_envs} vector envs")
+    return results
+
+
+def bench_api(args):
+    from werkzeug.serving import make_server
+
+    import enhanced_api
+
+    # Keep werkzeug's per-request access log out of the timings and the output
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, enhanced_api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    calls = 30 if args.quick else 200
+    results = {}
+    try:
+        for method, path, body in API_ENDPOINTS:
+            data = json.dumps(body).encode() if body is not None else None
+
+            def call():
+                req = urllib.request.Request(base + path, data=data, method=method,
+                                             headers={"Content-Type": "application/json"})
+                with urllib.request.urlopen(req) as resp:
+                    resp.read()
+
+            results[f"{method} {path}"] = _latencies(call, calls)
+            log.info(f"{method} {path}: p50 {results[f'{method} {path}']['p50Ms']:.2f} ms")
+    finally:
+        server.shutdown()
+    return results
+
+
+BENCHMARKS = {
+    "env": bench_env,
+    "act": bench_act,
+    "replay": bench_replay,
+    "baseline": bench_baseline,
+    "api": bench_api,
+}
+
+
+# ─── Main ─────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="bench_output.json", help="JSON file to write")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"comma-separated subset of {SUITES}")
+    parser.add_argument("--quick", action="store_true", help="smaller grids and fewer samples")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-time", type=float, default=None, help="seconds spent on each throughput number")
+    args = parser.parse_args(argv)
+    if args.min_time is None:
+        args.min_time = 0.5 if args.quick else 2.0
+
+    suites = [s.strip() for s in args.only.split(",") if s.strip()]
+    unknown = [s for s in suites if s not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown suites: {unknown}")
+
+    report = {"config": vars(args), "results": {}}
+    for suite in suites:
+        log.info(f"─── {suite} ───")
+        report["results"][suite] = BENCHMARKS[suite](args)
+    # Collected last so it records the TensorFlow version if a suite loaded it
+    report["metadata"] = _metadata()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    log.info(f"✏️  Saved {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+def capture(run, episode, config, episode_seeds):
+    """Snapshot a TrainingRun between episodes.
+
+    Everything is copied on the calling thread, so training can carry on
+    while a Checkpointer writes the snapshot. config holds the train()
+    arguments needed to resume, and episode_seeds the run's per-episode
+    seeds, so a resumed run replays the same markets.
+    """
+    agent = run.agent.snapshot()
+    rewards = run.reward_system.snapshot()
+    arrays = {f"agent/{k}": v for k, v in agent["arrays"].items()}
+    arrays.update({f"rewards/{k}": v for k, v in rewards["arrays"].items()})
+    return {
+        "arrays": arrays,
+        "meta": {
+            "episode": episode,
+            "config": config,
+            "episodeSeeds": episode_seeds,
+            "envRng": run.env.rng.bit_generator.state,
+            "agent": agent["meta"],
+            "rewards": rewards["meta"],
+            "createdAt": time.time()
+        }
+    }
+
+
+def restore(run, checkpoint):
+    """Load a checkpoint written by Checkpointer into a TrainingRun's env, agent and reward system"""
+    meta, arrays = checkpoint["meta"], checkpoint["arrays"]
+
+    def part(prefix):
+        return {k[len(prefix) + 1:]: v for k, v in arrays.items() if k.startswith(prefix + '/')}
+
+    run.agent.restore({"arrays": part("agent"), "meta": meta["agent"]})
+    run.reward_system.restore({"arrays": part("rewards"), "meta": meta["rewards"]})
+    run.env.rng.bit_generator.state = meta["envRng"]
+
+
+def latest_checkpoint(directory):
+    """Path of the newest complete checkpoint in directory, or None"""
+    if not os.path.isdir(directory):
+        return None
+    names = sorted(name for name in os.listdir(directory) if name.startswith('ckpt_'))
+    return os.path.join(directory, names[-1]) if names else None
+
+
+def prune_runs(directory, keep):
+    """Delete all but the newest keep run directories (named run_<timestamp>_...) in directory"""
+    if not os.path.isdir(directory):
+        return
+    runs = sorted(name for name in os.listdir(directory) if name.startswith('run_'))
+    for name in runs[:max(len(runs) - keep, 0)]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def read_meta(path):
+    with open(os.path.join(path, 'meta.json')) as f:
+        return json.load(f)
+
+
+def load_checkpoint(path):
+    """Read a checkpoint; its arrays are memory-mapped rather than loaded"""
+    arrays = {}
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.endswith('.npy'):
+                key = os.path.relpath(os.path.join(root, name[:-4]), path).replace(os.sep, '/')
+                arrays[key] = np.load(os.path.join(root, name), mmap_mode='r')
+    return {"meta": read_meta(path), "arrays": arrays}
+
+
+class Checkpointer:
+    """Writes training snapshots to disk on a background thread.
+
+    Each checkpoint is a directory path/ckpt_<episode> holding meta.json and
+    one .npy file per array, written under a temporary name and renamed
+    into place, so a crash mid-write never leaves a partial checkpoint.
+    Only the newest keep checkpoints are kept. One write runs at a time: a
+    save() that arrives while the previous write is still running is
+    skipped unless block is set.
+    """
+
+    def __init__(self, path, keep=3):
+        self.path = path
+        self.keep = keep
+        self.written = 0
+        self.skipped = 0
+        self.last_write_seconds = None
+        self.last_path = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint')
+        self._pending = None
+        os.makedirs(path, exist_ok=True)
+
+    def save(self, snapshot, block=False):
+        """Queue snapshot for writing; returns False if it was skipped"""
+        if self._pending is not None and not self._pending.done():
+            if not block:
+                self.skipped += 1
+                return False
+            self.wait()
+        self._pending = self._executor.submit(self._write, snapshot)
+        if block:
+            self.wait()
+        return True
+
+    def wait(self):
+        """Block until the write in progress (if any) has finished"""
+        if self._pending is not None:
+            try:
+                self._pending.result()
+            except Exception:
+                log.exception("Checkpoint write failed")
+
+    def close(self):
+        self.wait()
+        self._executor.shutdown()
+
+    def _write(self, snapshot):
+        start = time.perf_counter()
+        name = f"ckpt_{snapshot['meta']['episode']:06d}"
+        tmp = os.path.join(self.path, f".{name}.tmp")
+        final = os.path.join(self.path, name)
+        shutil.rmtree(tmp, ignore_errors=True)
+        for key, array in snapshot["arrays"].items():
+            file = os.path.join(tmp, *key.split('/')) + '.npy'
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            np.save(file, array)
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(snapshot["meta"], f)
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+
+        for old in sorted(n for n in os.listdir(self.path) if n.startswith('ckpt_'))[:-self.keep]:
+            shutil.rmtree(os.path.join(self.path, old), ignore_errors=True)
+        self.written += 1
+        self.last_path = final
+        self.last_write_seconds = time.perf_counter() - start
@@ -0,0 +1,3 @@
+# test_api.py is a script that drives a running API server (python test_api.py),
+# not a pytest module
+collect_ignore = ["test_api.py"]
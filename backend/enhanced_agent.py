@@ -1,10 +1,12 @@
+import os
+
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras.models import Model
-from tensorflow.keras.layers import Dense, Input, Lambda, Add, Subtract
+from tensorflow.keras.layers import Dense, Input, Lambda, Add, Subtract, Reshape
 from tensorflow.keras.optimizers import Adam
-import random
-from collections import deque
+
+from replay_buffer import ReplayBuffer, PrioritizedReplayBuffer
 
 class DQNAgent:
     def __init__(
@@ -17,42 +19,88 @@ class DQNAgent:
         epsilon_decay=0.995,
         epsilon_min=0.05,
         batch_size=64,
-        memory_size=5000
+        memory_size=5000,
+        action_branches=None,
+        gradient_steps=1,
+        prioritized_replay=False,
+        per_alpha=0.6,
+        per_beta=0.4,
+        seed=None
     ):
+        # Exploration and replay sampling draw from the agent's own generator
+        self.rng = np.random.default_rng(seed)
         self.state_size = state_size
+        # With action_branches set, the agent picks one of action_size levels
+        # for each of action_branches independent branches (e.g. products)
+        # instead of one of action_size joint actions.
         self.action_size = action_size
+        self.action_branches = action_branches
         self.learning_rate = learning_rate
         self.gamma = gamma
         self.epsilon = epsilon
         self.epsilon_decay = epsilon_decay
         self.epsilon_min = epsilon_min
         self.batch_size = batch_size
-        self.memory = deque(maxlen=memory_size)
+        # Minibatch updates performed per replay() call
+        self.gradient_steps = gradient_steps
+        self.prioritized_replay = prioritized_replay
+        memory_kwargs = dict(
+            action_shape=(action_branches,) if action_branches else (),
+            action_dtype=np.int32 if action_branches else np.int64,
+            rng=self.rng
+        )
+        if prioritized_replay:
+            self.memory = PrioritizedReplayBuffer(
+                memory_size, state_size, alpha=per_alpha, beta=per_beta, **memory_kwargs
+            )
+        else:
+            self.memory = ReplayBuffer(memory_size, state_size, **memory_kwargs)
 
         # Build online and target networks using dueling architecture
         self.model = self._build_model(dueling=True)
         self.target_model = self._build_model(dueling=True)
+        self._init_weights()
         self.update_target_model()
 
+        # Create optimizer slots eagerly so the compiled step never has to
+        self.model.optimizer.build(self.model.trainable_variables)
+        self._initial_optimizer = [v.numpy() for v in self.model.optimizer.variables]
+        self._train_step = self._build_train_step()
+
     def _build_model(self, dueling=False):
         inputs = Input(shape=(self.state_size,))
-        x = Dense(64, activation='relu')(inputs)
-        x = Dense(64, activation='relu')(x)
+        x = Dense(64, activation='relu', name='hidden_1')(inputs)
+        x = Dense(64, activation='relu', name='hidden_2')(x)
 
-        if dueling:
+        if self.action_branches:
+            # Branching dueling: a shared state value plus one advantage head
+            # per branch, packed into a single Dense layer and reshaped to
+            # (branches, action_size). Q_d(s, a) = V(s) + A_d(s, a) - mean_a A_d(s, a)
+            value_fc = Dense(32, activation='relu', name='value_fc')(x)
+            value = Dense(1, activation='linear', name='value')(value_fc)
+            value = Reshape((1, 1))(value)
+
+            adv_fc = Dense(32, activation='relu', name='advantage_fc')(x)
+            advantage = Dense(self.action_branches * self.action_size, activation='linear', name='advantage')(adv_fc)
+            advantage = Reshape((self.action_branches, self.action_size))(advantage)
+
+            advantage_mean = Lambda(lambda a: tf.reduce_mean(a, axis=2, keepdims=True))(advantage)
+            adv_sub = Subtract()([advantage, advantage_mean])
+            q_vals = Add()([value, adv_sub])
+        elif dueling:
             # Dueling: separate streams for state-value and advantage
-            value_fc = Dense(32, activation='relu')(x)
-            value = Dense(1, activation='linear')(value_fc)
+            value_fc = Dense(32, activation='relu', name='value_fc')(x)
+            value = Dense(1, activation='linear', name='value')(value_fc)
 
-            adv_fc = Dense(32, activation='relu')(x)
-            advantage = Dense(self.action_size, activation='linear')(adv_fc)
+            adv_fc = Dense(32, activation='relu', name='advantage_fc')(x)
+            advantage = Dense(self.action_size, activation='linear', name='advantage')(adv_fc)
 
             # Combine value and advantage
             advantage_mean = Lambda(lambda a: tf.reduce_mean(a, axis=1, keepdims=True))(advantage)
             adv_sub = Subtract()([advantage, advantage_mean])
             q_vals = Add()([value, adv_sub])
         else:
-            q_vals = Dense(self.action_size, activation='linear')(x)
+            q_vals = Dense(self.action_size, activation='linear', name='q_values')(x)
 
         model = Model(inputs, q_vals)
         model.compile(
@@ -61,48 +109,230 @@ class DQNAgent:
         )
         return model
 
+    def _init_weights(self):
+        """Draw Glorot-uniform kernels and zero biases from the agent's generator.
+
+        Keras would draw them from TensorFlow's global seed; drawing them here
+        makes a seeded agent start from the same network every time.
+        """
+        for layer in self.model.layers:
+            if isinstance(layer, Dense):
+                kernel, bias = layer.get_weights()
+                limit = np.sqrt(6.0 / sum(kernel.shape))
+                layer.set_weights([
+                    self.rng.uniform(-limit, limit, kernel.shape).astype(np.float32),
+                    np.zeros_like(bias)
+                ])
+
+    def reseed(self, seed):
+        """Start over as a fresh DQNAgent(seed=seed) would: generator, weights, optimizer slots and an empty replay buffer"""
+        # Set in place: the replay buffer samples from the same generator
+        self.rng.bit_generator.state = np.random.default_rng(seed).bit_generator.state
+        self._init_weights()
+        self.update_target_model()
+        for var, value in zip(self.model.optimizer.variables, self._initial_optimizer):
+            var.assign(value)
+        self.memory.clear()
+
     def update_target_model(self):
         self.target_model.set_weights(self.model.get_weights())
 
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.add(state, action, reward, next_state, done)
+
+    def remember_batch(self, states, actions, rewards, next_states, dones):
+        """Store one transition per row, e.g. from a vector environment step"""
+        self.memory.add_batch(states, actions, rewards, next_states, dones)
+
+    def _random_actions(self, n):
+        """Uniformly random actions for n states"""
+        if self.action_branches:
+            return self.rng.integers(self.action_size, size=(n, self.action_branches))
+        return self.rng.integers(self.action_size, size=n)
 
     def act(self, state, training=True):
-        if training and np.random.rand() < self.epsilon:
-            return random.randrange(self.action_size)
-        q = self.model.predict(state, verbose=0)
-        return np.argmax(q[0])
+        if training and self.rng.random() < self.epsilon:
+            if self.action_branches:
+                return self._random_actions(1)[0]
+            return int(self._random_actions(1)[0])
+        # A direct call skips predict()'s per-call data-pipeline setup
+        q = self.model(np.asarray(state, dtype=np.float32), training=False).numpy()
+        # Branching: argmax over the last axis gives one level per branch
+        return np.argmax(q[0], axis=-1)
+
+    def act_batch(self, states, training=True):
+        """Epsilon-greedy actions for a (N, state_size) batch in one forward pass"""
+        q = self.model(np.asarray(states, dtype=np.float32), training=False).numpy()
+        actions = np.argmax(q, axis=-1)
+        if training:
+            explore = self.rng.random(len(actions)) < self.epsilon
+            actions[explore] = self._random_actions(int(explore.sum()))
+        return actions
+
+    def _build_train_step(self):
+        """Compile the Double-DQN update into a single graph call.
+
+        The returned function takes minibatches stacked along a leading
+        gradient-step axis, i.e. states of shape (K, batch, state_size), and
+        runs K target/gather/Huber/Adam updates, weighting each sample's loss
+        by its importance-sampling weight. It returns the mean loss and the
+        (K, batch) absolute TD errors (averaged over branches).
+        """
+        model = self.model
+        target_model = self.target_model
+        optimizer = model.optimizer
+        gamma = self.gamma
+        branching = bool(self.action_branches)
+
+        @tf.function
+        def train_step(states, actions, rewards, next_states, dones, weights):
+            steps = tf.shape(states)[0]
+            td_errors = tf.TensorArray(tf.float32, size=steps)
+            total_loss = tf.constant(0.0)
+            for k in tf.range(steps):
+                s, a, r, s2, d, w = states[k], actions[k], rewards[k], next_states[k], dones[k], weights[k]
+                if branching:
+                    # Branch targets share the reward; broadcast it over branches
+                    r = r[:, None]
+                    d = d[:, None]
+                    w = w[:, None]
 
-    def replay(self):
+                # Double DQN target calculation (independently per branch)
+                # 1) online picks best next action, 2) target network evaluates it
+                next_a = tf.argmax(model(s2, training=False), axis=-1, output_type=tf.int32)
+                q_next = tf.gather(target_model(s2, training=False), next_a, batch_dims=next_a.shape.rank)
+                target_q = tf.stop_gradient(r + (1.0 - d) * gamma * q_next)
+
+                with tf.GradientTape() as tape:
+                    q_sa = tf.gather(model(s, training=True), a, batch_dims=a.shape.rank)
+                    err = target_q - q_sa
+                    # Huber loss (delta=1) for stability
+                    abs_err = tf.abs(err)
+                    quadratic = tf.minimum(abs_err, 1.0)
+                    loss = tf.reduce_mean(w * (0.5 * quadratic ** 2 + (abs_err - quadratic)))
+
+                grads = tape.gradient(loss, model.trainable_variables)
+                optimizer.apply_gradients(zip(grads, model.trainable_variables))
+
+                if branching:
+                    abs_err = tf.reduce_mean(abs_err, axis=1)
+                td_errors = td_errors.write(k, abs_err)
+                total_loss += loss
+            return total_loss / tf.cast(steps, tf.float32), td_errors.stack()
+
+        return train_step
+
+    def replay(self, gradient_steps=None):
         if len(self.memory) < self.batch_size:
             return
 
-        minibatch = random.sample(self.memory, self.batch_size)
-        states = np.vstack([m[0] for m in minibatch])
-        actions = np.array([m[1] for m in minibatch])
-        rewards = np.array([m[2] for m in minibatch])
-        next_states = np.vstack([m[3] for m in minibatch])
-        dones = np.array([m[4] for m in minibatch])
-
-        # Double DQN target calculation
-        # 1) online picks best next action
-        q_next_online = self.model.predict(next_states, verbose=0)
-        next_actions = np.argmax(q_next_online, axis=1)
-        # 2) target network evaluates it
-        q_next_target = self.target_model.predict(next_states, verbose=0)
-        target_q = rewards + (1 - dones) * self.gamma * q_next_target[np.arange(self.batch_size), next_actions]
+        steps = gradient_steps or self.gradient_steps
+        # One independent minibatch per gradient step
+        idx = self.memory.sample_indices(self.batch_size, steps)
+        states, actions, rewards, next_states, dones = self.memory.gather(idx)
+        if self.prioritized_replay:
+            weights = self.memory.importance_weights(idx, self.batch_size)
+        else:
+            weights = np.ones(len(idx), dtype=np.float32)
 
-        # current Q-values
-        q_vals = self.model.predict(states, verbose=0)
-        q_vals[np.arange(self.batch_size), actions] = target_q
+        # Stack into (steps, batch, ...) for the compiled update
+        shape = (steps, self.batch_size)
+        _, td_errors = self._train_step(
+            states.reshape(shape + states.shape[1:]),
+            actions.reshape(shape + actions.shape[1:]),
+            rewards.reshape(shape),
+            next_states.reshape(shape + next_states.shape[1:]),
+            dones.reshape(shape),
+            weights.reshape(shape)
+        )
 
-        # train
-        self.model.fit(states, q_vals, epochs=1, verbose=0)
+        if self.prioritized_replay:
+            self.memory.update_priorities(idx, td_errors.numpy().reshape(-1))
 
         # decay epsilon
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
 
+    def train_offline(self, dataset, target_update_interval=100):
+        """Train on logged experience instead of live interaction.
+
+        dataset yields (states, actions, rewards, next_states, dones) stacked
+        as (gradient_steps, batch, ...), e.g. from
+        offline_training.transition_dataset. The target network is synced
+        every target_update_interval compiled steps. Returns the mean loss.
+        """
+        losses = []
+        for i, (states, actions, rewards, next_states, dones) in enumerate(dataset):
+            loss, _ = self._train_step(states, actions, rewards, next_states, dones, tf.ones_like(rewards))
+            # Keep the losses as tensors so the loop never waits on the step
+            losses.append(loss)
+            if (i + 1) % target_update_interval == 0:
+                self.update_target_model()
+        self.update_target_model()
+        return float(tf.reduce_mean(losses)) if losses else 0.0
+
+    def policy_weights(self):
+        """Dense kernels and biases of the online network, keyed 'layer/kernel' and 'layer/bias'"""
+        weights = {}
+        for layer in self.model.layers:
+            if isinstance(layer, Dense):
+                kernel, bias = layer.get_weights()
+                weights[f"{layer.name}/kernel"] = kernel
+                weights[f"{layer.name}/bias"] = bias
+        return weights
+
+    def export_policy(self, path):
+        """Write the online network to a .npz file loadable by numpy_policy.NumpyPolicy.
+
+        The file is written under a temporary name and renamed into place,
+        so a serving process polling path never reads a partial policy.
+        """
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(
+                f,
+                action_size=self.action_size,
+                action_branches=self.action_branches or 0,
+                **self.policy_weights()
+            )
+        os.replace(tmp, path)
+
+    def snapshot(self):
+        """Copies of the training state: online/target weights, optimizer slots, epsilon, RNG and replay buffer.
+
+        Returns {'arrays': {name: ndarray}, 'meta': JSON-ready dict}; see
+        restore() and checkpointing.
+        """
+        memory = self.memory.snapshot()
+        arrays = {f"replay/{k}": v for k, v in memory["arrays"].items()}
+        arrays.update({f"model/{i}": w for i, w in enumerate(self.model.get_weights())})
+        arrays.update({f"target/{i}": w for i, w in enumerate(self.target_model.get_weights())})
+        arrays.update({f"optimizer/{i}": v.numpy() for i, v in enumerate(self.model.optimizer.variables)})
+        return {
+            "arrays": arrays,
+            "meta": {"epsilon": self.epsilon, "rng": self.rng.bit_generator.state, "replay": memory["meta"]}
+        }
+
+    def restore(self, snapshot):
+        """Load a snapshot() taken from an agent of the same shape"""
+        arrays = snapshot["arrays"]
+
+        def listed(prefix):
+            count = sum(1 for k in arrays if k.startswith(prefix + '/'))
+            return [np.asarray(arrays[f"{prefix}/{i}"]) for i in range(count)]
+
+        self.model.set_weights(listed("model"))
+        self.target_model.set_weights(listed("target"))
+        for var, value in zip(self.model.optimizer.variables, listed("optimizer")):
+            var.assign(value)
+        self.epsilon = snapshot["meta"]["epsilon"]
+        # Set in place: the replay buffer samples from the same generator
+        self.rng.bit_generator.state = snapshot["meta"]["rng"]
+        self.memory.restore({
+            "arrays": {k[len("replay/"):]: v for k, v in arrays.items() if k.startswith("replay/")},
+            "meta": snapshot["meta"]["replay"]
+        })
+
     def save(self, name):
         self.model.save_weights(name)
 
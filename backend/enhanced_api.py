@@ -1,27 +1,52 @@
 #!/usr/bin/env python3
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
+import collections
+import copy
+import logging
 import numpy as np
-import random
+import os
 import time
 import threading
+import uuid
 
 from enhanced_env import MarketEnvironment
-from enhanced_agent import DQNAgent
+from baseline_evaluation import STRATEGIES, evaluate_baselines
+from batching import DynamicBatcher
+from checkpointing import latest_checkpoint, prune_runs, read_meta
 from human_baseline import HumanBaseline
+from metrics import MetricsRegistry
+from numpy_policy import NumpyPolicy
 from enhanced_reward_system import EnhancedRewardSystem
+from response_cache import ResponseCache
+from training import TrainingRun
+from training_events import TrainingEventLog
+from training_jobs import TrainingJobManager
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["X-Total-Count"])
 
 # ─── Globals ──────────────────────────────────────────────────────────────────
 env = MarketEnvironment(num_products=5, num_customer_segments=3, time_periods=24, competitors=2)
 state_size = env.state_size
 action_size = env.action_size
 
-agent    = DQNAgent(state_size, action_size)
+# The agent (and TensorFlow) is only created on first training use;
+# see get_agent()
+agent    = None
+# Training runs of the shared agent export their greedy policy here, and
+# /api/recommend serves it with NumPy alone; see get_policy()
+POLICY_PATH = os.environ.get('POLICY_PATH', 'smart_pricing_policy.npz')
+policy = None
+_policy_mtime = None
 baseline = HumanBaseline(env, strategy='combined')
-reward_system = EnhancedRewardSystem(baseline_comparison=True)
+# Optional reward-history retention: keep the last REWARD_KEEP_RECENT episodes
+# at full resolution and fold older ones into REWARD_BUCKET_SIZE-episode means
+REWARD_RETENTION = {
+    "keep_recent": int(os.environ['REWARD_KEEP_RECENT']) if os.environ.get('REWARD_KEEP_RECENT') else None,
+    "bucket_size": int(os.environ.get('REWARD_BUCKET_SIZE', 100))
+}
+reward_system = EnhancedRewardSystem(baseline_comparison=True, **REWARD_RETENTION)
 
 training_status = {
     "isTraining": False,
@@ -39,92 +64,290 @@ training_results = {
     "baselineHistory": []
 }
 
+# The run behind training_status/training_results; its results_version (with
+# the event log's run id) is the ETag of /api/training_results. The boot id
+# keeps ETags from a previous server process from matching.
+current_run = None
+_boot_id = uuid.uuid4().hex[:8]
+
+# Where runs started with logTrajectories write their step logs
+TRAJECTORY_DIR = os.environ.get('TRAJECTORY_DIR', 'trajectories')
+
+# Runs of the shared agent started with checkpointEvery checkpoint into
+# their own subdirectory here, of which the newest CHECKPOINT_KEEP_RUNS are
+# kept; /api/resume_training continues the newest one
+CHECKPOINT_DIR = os.environ.get('CHECKPOINT_DIR', 'checkpoints')
+CHECKPOINT_KEEP_RUNS = int(os.environ.get('CHECKPOINT_KEEP_RUNS', 3))
+
+# Encoded bodies of the env-derived analytics endpoints; invalidated when
+# /api/generate_sample_data replaces env
+response_cache = ResponseCache(dumps=app.json.dumps)
+
+# Per-episode events pushed to /api/training_stream clients
+training_events = TrainingEventLog()
+
+# Counters and gauges served by /api/metrics
+metrics = MetricsRegistry()
+
+# Requests slower than this are logged and kept in slow_requests
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 500))
+slow_requests = collections.deque(maxlen=100)
+log = logging.getLogger(__name__)
+
 training_thread = None
 
 
+class PolicyUnavailable(Exception):
+    """No trained policy has been exported for the current market yet"""
+
+
+_agent_lock = threading.Lock()
+_policy_lock = threading.Lock()
+
+
+def _recommend_actions(states):
+    """Greedy actions for a batch of states from the exported policy"""
+    current = get_policy()
+    if current is None:
+        raise PolicyUnavailable(POLICY_PATH)
+    return current.act_batch(states)
+
+
+# Concurrent /api/recommend requests share one forward pass per batching window
+recommend_batcher = DynamicBatcher(
+    _recommend_actions,
+    max_batch_size=int(os.environ.get('RECOMMEND_MAX_BATCH', 256)),
+    max_delay=float(os.environ.get('RECOMMEND_MAX_DELAY_MS', 2)) / 1000
+)
+
+def get_agent():
+    """Return the DQN agent, importing TensorFlow and building it on first use"""
+    global agent
+    with _agent_lock:
+        if agent is None:
+            from enhanced_agent import DQNAgent
+            # Branching agent: one 5-way price-level head per product rather
+            # than a single head over all 5 ** num_products joint actions
+            agent = DQNAgent(state_size, env.num_price_levels, action_branches=env.action_branches)
+    return agent
+
+
+def get_policy():
+    """Return the NumpyPolicy exported to POLICY_PATH, or None if there is none for this market.
+
+    The file is reloaded whenever a training run replaces it.
+    """
+    global policy, _policy_mtime
+    try:
+        mtime = os.stat(POLICY_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _policy_lock:
+        if mtime != _policy_mtime:
+            loaded = NumpyPolicy.load(POLICY_PATH)
+            if loaded.state_size != state_size or loaded.action_branches != env.action_branches:
+                log.warning(f"Ignoring {POLICY_PATH}: exported for a different market shape")
+                loaded = None
+            policy, _policy_mtime = loaded, mtime
+    return policy
+
+
 # ─── Core Training Loop ───────────────────────────────────────────────────────
-def train_agent(episodes=10, use_baseline=True, baseline_strategy='combined'):
-    global training_status, training_results, env, agent, baseline, reward_system
-
-    training_status.update({
-        "isTraining": True,
-        "currentEpisode": 0,
-        "totalEpisodes": episodes,
-        "startTime": time.time(),
-        "endTime": None
-    })
+def _shared_run():
+    global current_run
+    current_run = TrainingRun(
+        env, get_agent(), baseline, reward_system,
+        status=training_status, results=training_results, events=training_events, metrics=metrics
+    )
+    return current_run
+
+
+def train_agent(episodes=10, use_baseline=True, baseline_strategy='combined', num_envs=1, num_actors=0,
+                trajectory_path=None, seed=None, checkpoint_every=0):
+    """Train the shared agent on the shared env, publishing into the global status/results"""
+    checkpoint_dir = None
+    if checkpoint_every:
+        # Make room for this run's directory among the kept ones
+        prune_runs(CHECKPOINT_DIR, max(CHECKPOINT_KEEP_RUNS - 1, 0))
+        checkpoint_dir = os.path.join(CHECKPOINT_DIR, f"run_{int(time.time())}_{uuid.uuid4().hex[:6]}")
+    _shared_run().train(
+        episodes, use_baseline, baseline_strategy, num_envs, num_actors,
+        save_path="smart_pricing_model.h5", policy_path=POLICY_PATH, trajectory_path=trajectory_path, seed=seed,
+        checkpoint_dir=checkpoint_dir, checkpoint_every=checkpoint_every
+    )
 
-    reward_system.reset()
-    agent.epsilon = 1.0
-    agent.update_target_model()
-
-    if baseline.strategy != baseline_strategy:
-        baseline.strategy = baseline_strategy
-
-    # Pre-generate seeds for reproducibility
-    seeds = [random.randrange(2**32) for _ in range(episodes)]
-
-    for ep in range(episodes):
-        seed = seeds[ep]
-        training_status["currentEpisode"] = ep + 1
-
-        # 1) Baseline run
-        if use_baseline:
-            random.seed(seed)
-            np.random.seed(seed)
-            b_reward, _, _ = baseline.run_episode()
-            reward_system.add_baseline_reward(b_reward)
-
-        # 2) Agent run
-        random.seed(seed)
-        np.random.seed(seed)
-        state = env.reset()
-        total_reward = 0
-        done = False
-
-        while not done:
-            action = agent.act(state)
-            next_state, reward, done, _ = env.step(action)
-            agent.remember(state, action, reward, next_state, done)
-            state = next_state
-            total_reward += reward
-            if len(agent.memory) > agent.batch_size:
-                agent.replay()
-
-        reward_system.add_agent_reward(total_reward)
-
-        if (ep + 1) % 10 == 0:
-            agent.update_target_model()
-
-        # Update results
-        hist = reward_system.agent_rewards
-        training_results.update({
-            "rewardHistory": hist,
-            "baselineHistory": reward_system.baseline_rewards,
-            "finalReward": hist[-1],
-            "avgLast10": float(np.mean(hist[-10:])),
-            "improvementOverBaseline": reward_system.get_improvement_percentage()
-        })
 
-        time.sleep(0.1)
+def resume_agent(checkpoint_dir, checkpoint_every=None):
+    """Continue a checkpointed run of the shared agent"""
+    _shared_run().resume(checkpoint_dir, checkpoint_every=checkpoint_every, save_path="smart_pricing_model.h5",
+                         policy_path=POLICY_PATH)
+
+
+def _latest_run_checkpoint():
+    """(run directory, checkpoint path) of the newest checkpointed run, or (None, None)"""
+    if os.path.isdir(CHECKPOINT_DIR):
+        for name in sorted(os.listdir(CHECKPOINT_DIR), reverse=True):
+            run_dir = os.path.join(CHECKPOINT_DIR, name)
+            path = latest_checkpoint(run_dir)
+            if path is not None:
+                return run_dir, path
+    return None, None
+
+
+def _make_job_run(config):
+    """Build a TrainingRun with its own copy of env and a fresh agent for a job"""
+    from enhanced_agent import DQNAgent
+    job_env = copy.deepcopy(env)
+    job_agent = DQNAgent(job_env.state_size, job_env.num_price_levels, action_branches=job_env.action_branches)
+    return TrainingRun(
+        job_env, job_agent, HumanBaseline(job_env, strategy=config['baseline_strategy']),
+        EnhancedRewardSystem(baseline_comparison=True, **REWARD_RETENTION)
+    )
+
+
+# Isolated training jobs, each with its own env/agent/reward system
+job_manager = TrainingJobManager(
+    _make_job_run,
+    max_workers=int(os.environ.get('TRAINING_JOB_WORKERS', 2)),
+    max_queued=int(os.environ.get('TRAINING_JOB_QUEUE', 8)),
+    max_finished=int(os.environ.get('TRAINING_JOB_KEEP_FINISHED', 50))
+)
+
+
+def _training_config(data):
+    """Validated train() keyword arguments from a start_training/jobs request body"""
+    return {
+        "episodes": max(1, min(int(data.get('episodes', 10)), 1000)),
+        "use_baseline": bool(data.get('useBaseline', True)),
+        "baseline_strategy": data.get('baselineStrategy', 'combined'),
+        "num_envs": max(1, min(int(data.get('numEnvs', 1)), 256)),
+        "num_actors": max(0, min(int(data.get('numActors', 0)), os.cpu_count() or 1)),
+        "trajectory_path": os.path.join(TRAJECTORY_DIR, f"run_{int(time.time())}_{uuid.uuid4().hex[:6]}")
+        if data.get('logTrajectories') else None,
+        "seed": int(data['seed']) if data.get('seed') is not None else None,
+        "checkpoint_every": max(0, int(data.get('checkpointEvery', 0)))
+    }
+
+
+# ─── Request instrumentation ──────────────────────────────────────────────────
+request_latency = metrics.histogram('http_request_duration_seconds', 'Request latency per route')
+response_size = metrics.histogram(
+    'http_response_size_bytes', 'Response body size per route',
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+)
+requests_in_flight = metrics.gauge('http_requests_in_flight', 'Requests being handled per route')
+requests_total = metrics.counter('http_requests_total', 'Requests per route and status')
+
+
+def _route():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+    requests_in_flight.inc(route=_route())
+
+
+@app.after_request
+def _record_request(response):
+    seconds = time.perf_counter() - g.request_start
+    route = _route()
+    # Streamed responses (the SSE endpoint) have no size and are timed to their first byte
+    size = None if response.is_streamed else response.calculate_content_length()
+    request_latency.observe(seconds, route=route, method=request.method)
+    if size is not None:
+        response_size.observe(size, route=route, method=request.method)
+    requests_total.inc(route=route, method=request.method, status=str(response.status_code))
+
+    if seconds * 1000 >= SLOW_REQUEST_MS:
+        entry = {
+            "time": time.time(),
+            "method": request.method,
+            "route": route,
+            "path": request.full_path.rstrip('?'),
+            "status": response.status_code,
+            "ms": round(seconds * 1000, 2),
+            "requestBytes": request.content_length or 0,
+            "responseBytes": size
+        }
+        slow_requests.append(entry)
+        log.warning("Slow request %s %s: %.1f ms, %s request bytes, %s response bytes",
+                    request.method, entry["path"], entry["ms"], entry["requestBytes"], size)
+    return response
+
+
+@app.teardown_request
+def _finish_request(exc=None):
+    # Streamed responses tear the context down twice; only count the first
+    if g.pop('request_start', None) is not None:
+        requests_in_flight.dec(route=_route())
+
+
+# ─── Helpers for incremental endpoints ────────────────────────────────────────
+class BadArgument(ValueError):
+    """A malformed query argument or header; answered with a 400"""
+
+
+@app.errorhandler(BadArgument)
+def _bad_argument(e):
+    return jsonify({"success": False, "message": str(e)}), 400
+
+
+def _int_arg(name, value):
+    """value as an int, or BadArgument naming the argument it came from"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise BadArgument(f"{name} must be an integer, got {value!r}")
+
+
+def _cursor_args():
+    """Read the since=/limit= episode cursor from the query string"""
+    since = max(0, _int_arg('since', request.args.get('since', 0)))
+    limit = request.args.get('limit')
+    return since, (max(0, _int_arg('limit', limit)) if limit is not None else None)
+
+
+def _page_args():
+    """Read the offset=/limit= catalog page (limit defaults to 100, at most 1000) from the query string"""
+    offset = max(0, _int_arg('offset', request.args.get('offset', 0)))
+    limit = max(0, min(_int_arg('limit', request.args.get('limit', 100)), 1000))
+    return offset, limit
 
-    training_status.update({
-        "isTraining": False,
-        "endTime": time.time()
-    })
-    agent.save("smart_pricing_model.h5")
+
+def _conditional_json(etag, build):
+    """304 if the client already holds etag, otherwise jsonify(build()) tagged with it"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    return response
+
+
+def _cached_json(key, build):
+    """Serve build()'s JSON from response_cache, gzipped when the client accepts it"""
+    body, gzipped = response_cache.get(key, build)
+    if gzipped is not None and 'gzip' in request.accept_encodings:
+        response = Response(gzipped, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(body, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    return response
 
 
 # ─── Helpers for static endpoints ─────────────────────────────────────────────
-def _compute_price_demand(env):
-    out = []
-    for product in env.get_products():
-        bp = product['base_price']
-        pts = [bp * f for f in (0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3)]
-        demand = [max(0, 100*(bp/p)**1.5) for p in pts]
-        revenue = [p*d/100 for p,d in zip(pts,demand)]
-        out.append((product, pts, demand, revenue))
-    return out
+def _compute_price_demand(env, offset=0, limit=None):
+    """Names, price points, demand and revenue of products offset..offset+limit, one row per product"""
+    stop = env.num_products if limit is None else min(env.num_products, offset + limit)
+    bp = env.base_prices[offset:stop, None]
+    pts = bp * np.array([0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3])
+    demand = 100 * (bp / pts) ** 1.5
+    revenue = pts * demand / 100
+    names = [env.catalog.name(i) for i in range(offset, stop)]
+    return names, pts, demand, revenue
 
 def _compute_time_pricing():
     times = ['6 AM','8 AM','10 AM','12 PM','2 PM','4 PM','6 PM','8 PM','10 PM']
@@ -148,22 +371,100 @@ def _compute_segment_data(env):
 @app.route('/api/start_training', methods=['POST'])
 def start_training():
     global training_thread
-    data = request.json or {}
-    episodes = int(data.get('episodes', 10))
-    episodes = max(1, min(episodes, 1000))
-    use_baseline = bool(data.get('useBaseline', True))
-    baseline_strategy = data.get('baselineStrategy', 'combined')
+    config = _training_config(request.json or {})
 
     if training_thread and training_thread.is_alive():
         return jsonify({"success": False, "message": "Training already in progress"}), 400
 
     training_thread = threading.Thread(
         target=train_agent,
-        args=(episodes, use_baseline, baseline_strategy),
+        kwargs=config,
         daemon=True
     )
     training_thread.start()
-    return jsonify({"success": True, "message": f"Training started for {episodes} episodes"})
+    return jsonify({"success": True, "message": f"Training started for {config['episodes']} episodes"})
+
+
+@app.route('/api/resume_training', methods=['POST'])
+def resume_training():
+    """Continue the newest checkpointed run of the shared agent where it stopped"""
+    global training_thread
+
+    if training_thread and training_thread.is_alive():
+        return jsonify({"success": False, "message": "Training already in progress"}), 400
+    run_dir, path = _latest_run_checkpoint()
+    if path is None:
+        return jsonify({"success": False, "message": "No checkpoint to resume from"}), 404
+
+    meta = read_meta(path)
+    if meta["episode"] >= meta["config"]["episodes"]:
+        return jsonify({"success": False, "message": "The latest run already finished"}), 400
+    # Keep the run's own checkpoint interval unless the request overrides it
+    checkpoint_every = (request.get_json(silent=True) or {}).get('checkpointEvery')
+    if checkpoint_every is not None:
+        checkpoint_every = max(0, int(checkpoint_every))
+    training_thread = threading.Thread(
+        target=resume_agent,
+        args=(run_dir, checkpoint_every),
+        daemon=True
+    )
+    training_thread.start()
+    return jsonify({
+        "success": True,
+        "message": f"Resuming training at episode {meta['episode'] + 1} of {meta['config']['episodes']}",
+        "checkpoint": path,
+        "episode": meta["episode"],
+        "config": meta["config"]
+    })
+
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    config = _training_config(request.json or {})
+    if config['checkpoint_every']:
+        # Jobs have no checkpoint directory and cannot be resumed
+        return jsonify({"success": False, "message": "checkpointEvery is not supported for jobs"}), 400
+    job = job_manager.submit(config)
+    if job is None:
+        return jsonify({"success": False, "message": "Training job queue is full"}), 429
+    return jsonify({"success": True, "job": job.to_dict()}), 202
+
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify([job.to_dict() for job in job_manager.list()])
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/jobs/<job_id>/results', methods=['GET'])
+def get_job_results(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Unknown job"}), 404
+    return jsonify(job.results_payload())
+
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Unknown job"}), 404
+    return jsonify({"success": True, "job": job.to_dict()})
+
+
+@app.route('/api/warmup', methods=['POST'])
+def warmup():
+    """Build the agent and trace its forward pass ahead of the first real request"""
+    start = time.time()
+    get_agent().act(np.zeros((1, state_size)), training=False)
+    return jsonify({"success": True, "seconds": round(time.time() - start, 3)})
 
 
 @app.route('/api/training_status', methods=['GET'])
@@ -173,20 +474,117 @@ def get_status():
 
 @app.route('/api/training_results', methods=['GET'])
 def get_results():
-    return jsonify(training_results)
+    since, limit = _cursor_args()
+
+    def build():
+        if current_run is not None:
+            return current_run.results_payload(since, limit)
+        if not since and limit is None:
+            return training_results
+        return dict(training_results, since=since, episodeCount=0)
+
+    return _conditional_json(f"{_boot_id}-results-{training_events.run_id}-{current_run.results_version if current_run else 0}-{since}-{limit}", build)
+
+
+@app.route('/api/training_timings', methods=['GET'])
+def get_training_timings():
+    """Per-episode phase timings of the current run, with the since=/limit= cursor"""
+    since, limit = _cursor_args()
+    timings = current_run.timings if current_run else []
+    end = None if limit is None else since + limit
+    return jsonify({"since": since, "episodeCount": len(timings), "timings": timings[since:end]})
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Training metrics in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/request_stats', methods=['GET'])
+def get_request_stats():
+    """Per-route latency percentiles, response sizes and in-flight counts, plus recent slow requests"""
+    routes = []
+    for labels in request_latency.label_sets():
+        latency = request_latency.summary(**labels)
+        size = response_size.summary(**labels)
+        routes.append({
+            "route": labels["route"],
+            "method": labels["method"],
+            "count": latency["count"],
+            "meanMs": latency["sum"] / latency["count"] * 1000,
+            "p50Ms": latency["p50"] * 1000,
+            "p90Ms": latency["p90"] * 1000,
+            "p99Ms": latency["p99"] * 1000,
+            "meanResponseBytes": size["sum"] / size["count"] if size["count"] else None,
+            "inFlight": int(requests_in_flight.value(route=labels["route"]))
+        })
+    routes.sort(key=lambda r: r["p99Ms"], reverse=True)
+    return jsonify({
+        "slowRequestMs": SLOW_REQUEST_MS,
+        "routes": routes,
+        "slowRequests": list(slow_requests)
+    })
+
+
+@app.route('/api/training_stream', methods=['GET'])
+def training_stream():
+    """Server-Sent Events: one small event per finished episode.
+
+    Resume with ?since=<episode> or the Last-Event-ID header to receive only
+    the episodes after it. The stream stays open across runs, with
+    keep-alive comments while idle: a finished run sends a done event and
+    the next run a reset event. With ?untilDone=1 the stream closes after
+    the done event instead.
+    """
+    if 'since' in request.args:
+        cursor = _int_arg('since', request.args['since'])
+    else:
+        cursor = _int_arg('Last-Event-ID', request.headers.get('Last-Event-ID', 0))
+    until_done = request.args.get('untilDone', '').lower() in ('1', 'true')
+
+    def generate(cursor):
+        run_id = training_events.run_id
+        seen_finish = False
+        yield "retry: 2000\n\n"
+        while True:
+            new_run_id, events, finished = training_events.wait_for(run_id, cursor, timeout=15,
+                                                                    seen_finish=seen_finish)
+            if new_run_id != run_id:
+                run_id, cursor, seen_finish = new_run_id, 0, False
+                yield "event: reset\ndata: {}\n\n"
+            for event_id, payload in events:
+                yield f"id: {event_id}\nevent: episode\ndata: {payload}\n\n"
+                cursor = event_id
+            if finished and not seen_finish and not events:
+                seen_finish = True
+                yield "event: done\ndata: {}\n\n"
+                if until_done:
+                    return
+            elif not events:
+                yield ": keep-alive\n\n"
+
+    return Response(
+        stream_with_context(generate(cursor)),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.route('/api/products', methods=['GET'])
 def get_products():
-    prods = env.get_products()
-    for p in prods:
-        bp, cp = p['base_price'], p['current_price']
-        p['recommendation'] = (
-            'Increase Price' if cp < bp*0.9 else
-            'Decrease Price' if cp > bp*1.1 else
-            'Maintain Price'
-        )
-    return jsonify(prods)
+    """One page of the catalog (?offset=, ?limit= up to 1000); X-Total-Count has the catalog size"""
+    offset, limit = _page_args()
+    prods = env.get_products(offset, limit)
+    ratio = (env.current_prices / env.base_prices)[offset:offset + len(prods)]
+    recommendations = np.where(
+        ratio < 0.9, 'Increase Price', np.where(ratio > 1.1, 'Decrease Price', 'Maintain Price')
+    )
+    for p, rec in zip(prods, recommendations.tolist()):
+        p['recommendation'] = rec
+    response = jsonify(prods)
+    response.headers['X-Total-Count'] = str(env.num_products)
+    return response
 
 
 @app.route('/api/customer_segments', methods=['GET'])
@@ -198,35 +596,96 @@ def get_customer_segments():
 def generate_sample_data():
     global env
     env = MarketEnvironment(num_products=5, num_customer_segments=3, time_periods=24, competitors=2)
-    return jsonify({"products": env.get_products()})
+    response_cache.invalidate()
+    # The first page of the new catalog; /api/products pages through the rest
+    return jsonify({"productCount": env.num_products, "products": env.get_products(0, 100)})
 
 
 @app.route('/api/baseline_comparison', methods=['GET'])
 def baseline_comp():
-    return jsonify(reward_system.get_reward_history())
+    since, limit = _cursor_args()
+    return _conditional_json(
+        f"{_boot_id}-rewards-{reward_system.version}-{since}-{limit}",
+        lambda: reward_system.get_reward_history(since, limit)
+    )
+
+
+@app.route('/api/evaluate', methods=['POST'])
+def evaluate():
+    """Compare baseline strategies across many seeds in a process pool"""
+    data = request.json or {}
+    strategies = data.get('strategies', list(STRATEGIES))
+    unknown = [s for s in strategies if s not in STRATEGIES]
+    if not strategies or unknown:
+        return jsonify({"success": False, "message": f"Unknown strategies: {unknown}"}), 400
+    num_seeds = max(2, min(int(data.get('seeds', 200)), 10000))
+    processes = max(1, min(int(data.get('processes', os.cpu_count() or 1)), os.cpu_count() or 1))
+
+    results = evaluate_baselines(env, strategies, num_seeds, seed=data.get('seed'), processes=processes)
+    return jsonify({"success": True, "seeds": num_seeds, "results": results})
+
+
+@app.route('/api/recommend', methods=['POST'])
+def recommend():
+    """Greedy prices from the agent for one ("state") or many ("states") market states.
+
+    Without either, recommends for the current market state. Served with
+    NumPy alone from the policy the last training run exported; until there
+    is one the endpoint answers 503.
+    """
+    data = request.json or {}
+    try:
+        if 'states' in data:
+            states = np.asarray(data['states'], dtype=np.float32)
+        elif 'state' in data:
+            states = np.asarray(data['state'], dtype=np.float32)[np.newaxis]
+        else:
+            states = env._get_state().astype(np.float32)
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "States must be numeric"}), 400
+    if states.ndim != 2 or states.shape[1] != state_size or not len(states):
+        return jsonify({"success": False, "message": f"Expected states of width {state_size}"}), 400
+
+    market = env
+    try:
+        if get_policy() is None:
+            raise PolicyUnavailable(POLICY_PATH)
+        prices = market.levels_to_prices(recommend_batcher(states))
+    except PolicyUnavailable:
+        return jsonify({"success": False, "message": "No trained policy yet; train the agent first"}), 503
+    return jsonify({
+        "success": True,
+        "productIds": market.product_ids,
+        "prices": np.round(prices, 2).tolist(),
+        "priceChanges": np.round(prices / market.base_prices - 1, 4).tolist()
+    })
 
 
 @app.route('/api/price_demand_data', methods=['GET'])
 def price_demand_data():
-    out = []
-    for p, pts, dm, rv in _compute_price_demand(env):
-        out.append({
-            "product": p['name'],
-            "pricePoints": [round(x,2) for x in pts],
-            "demand": [round(x,2) for x in dm],
-            "revenue": [round(x,2) for x in rv]
-        })
-    return jsonify(out)
+    """Price-demand curves for one page of the catalog (?offset=, ?limit= up to 1000); X-Total-Count has the catalog size"""
+    offset, limit = _page_args()
+
+    def build():
+        names, pts, dm, rv = _compute_price_demand(env, offset, limit)
+        return [
+            {"product": name, "pricePoints": p, "demand": d, "revenue": r}
+            for name, p, d, r in zip(names, np.round(pts, 2).tolist(), np.round(dm, 2).tolist(),
+                                     np.round(rv, 2).tolist())
+        ]
+    response = _cached_json(f'price_demand_data-{offset}-{limit}', build)
+    response.headers['X-Total-Count'] = str(env.num_products)
+    return response
 
 
 @app.route('/api/time_pricing_data', methods=['GET'])
 def time_pricing_data():
-    return jsonify(_compute_time_pricing())
+    return _cached_json('time_pricing_data', _compute_time_pricing)
 
 
 @app.route('/api/customer_segment_data', methods=['GET'])
 def customer_segment_data():
-    return jsonify(_compute_segment_data(env))
+    return _cached_json('customer_segment_data', lambda: _compute_segment_data(env))
 
 
 if __name__ == '__main__':
@@ -1,117 +1,225 @@
+import copy
 import numpy as np
-import random
-import pandas as pd
 from datetime import datetime, timedelta
 
+from product_catalog import ProductCatalog
+
+# Discrete price adjustments available to every product: -10%, -5%, 0%, +5%, +10%
+PRICE_LEVELS = np.array([-0.1, -0.05, 0, 0.05, 0.1])
+# Price-level index of an unchanged price
+BASE_LEVEL = int(np.flatnonzero(PRICE_LEVELS == 0)[0])
+# Price relative to base of every level
+_PRICE_FACTORS = 1 + PRICE_LEVELS
+# Joint action spaces up to this size are decoded through a lookup table
+_MAX_DECODE_TABLE = 5 ** 6
+# Largest product count whose joint action indices (up to 5 ** n - 1) fit in int64
+MAX_JOINT_PRODUCTS = 27
+
+
+def _nearest_price_levels(prices, base_prices):
+    """Index of the closest entry of PRICE_LEVELS to each price's change from base"""
+    price_ratio = np.asarray(prices) / base_prices - 1.0  # Convert to percentage change
+    # argmin keeps the first of equally close levels, like min() over range(5)
+    return np.abs(PRICE_LEVELS - price_ratio[..., None]).argmin(axis=-1)
+
+
+def _joint_place_values(num_products):
+    """Place value 5 ** i of each product in a joint action index"""
+    if num_products > MAX_JOINT_PRODUCTS:
+        raise ValueError(
+            f"Joint action indices overflow int64 beyond {MAX_JOINT_PRODUCTS} products "
+            f"(got {num_products}); use per-product price levels instead"
+        )
+    return 5 ** np.arange(num_products)
+
+
+def _price_sides(price_ratio):
+    """+1 for each price customers like, -1 for each they dislike and 0 otherwise"""
+    # Customers like prices below 90% of base and dislike prices above 110%.
+    # The ratio is the float current / base, so a +/-10% level can land
+    # either side of the boundary depending on the base price.
+    return (price_ratio < 0.9).astype(np.int64) - (price_ratio > 1.1)
+
+
+def _price_level_demand(segment_sizes, qualities, seasonalities, price_sensitivity, quality_preference):
+    """Demand per segment for every (product, price level), before the per-step effects"""
+    # Base segment demand, quality, seasonality and the own-price effect of
+    # each level never change during an episode. Result shape is
+    # (..., segments, products * levels), product p at level l in column
+    # p * levels + l.
+    quality_effect = 0.5 + 0.5 * qualities[..., None, :] ** quality_preference[..., :, None]
+    scale = 100 * segment_sizes[..., :, None] * quality_effect * seasonalities[..., None, :]
+    own_price_effect = (1.0 / (1.0 + PRICE_LEVELS)) ** price_sensitivity[..., :, None]
+    table = scale[..., :, :, None] * own_price_effect[..., :, None, :]
+    return table.reshape(table.shape[:-2] + (-1,))
+
+
+def _product_demand(prices, competitor_prices, stocks, segment_demand, segment_effect, noise):
+    """Integer demand per product for one market or a batch of markets"""
+    # Leading axes index markets. segment_demand (..., segments, products)
+    # comes from _price_level_demand and is scaled in place; segment_effect
+    # (..., segments) holds the time and loyalty factors.
+    # Competitor price effect: every cheaper competitor reduces our demand
+    competitor_ratio = competitor_prices / prices[..., None, :]
+    np.minimum(competitor_ratio, 1.0, out=competitor_ratio)
+    competitor_ratio *= 0.5
+    competitor_ratio += 0.5
+    competitor_price_effect = np.multiply.reduce(competitor_ratio, axis=-2)
+
+    # Add randomness per segment and product, then sum the segments
+    # weighted by their time and loyalty effects
+    segment_demand *= noise
+    product_demand = np.matmul(segment_effect[..., None, :], segment_demand)[..., 0, :]
+    product_demand *= competitor_price_effect
+
+    # Ensure demand doesn't exceed stock; every factor is positive, so the
+    # cast truncates towards zero like int()
+    np.minimum(product_demand, stocks, out=product_demand)
+    return product_demand.astype(np.int64)
+
+
 class MarketEnvironment:
-    def __init__(self, num_products=5, num_customer_segments=3, time_periods=24, competitors=2):
+    """A simulated market of products, customer segments and competitors.
+
+    All randomness, from building the market to the per-step noise, comes
+    from the environment's own np.random.Generator (self.rng), seeded with
+    seed and reseeded by reset(seed=...), so environments can run side by
+    side and stay reproducible.
+    """
+
+    def __init__(self, num_products=5, num_customer_segments=3, time_periods=24, competitors=2, seed=None):
+        self.rng = np.random.default_rng(seed)
         self.num_products = num_products
         self.num_customer_segments = num_customer_segments
         self.time_periods = time_periods
         self.competitors = competitors
         self.current_time = 0
 
-        # Initialize products and remember their starting stock
-        self.products = self._initialize_products()
-        self._initial_stocks = [p['stock'] for p in self.products]
+        # Initialize products; the catalog keeps their starting stock
+        self.catalog = self._initialize_products()
+        self._initial_stocks = self.catalog.stocks
 
         self.customer_segments = self._initialize_customer_segments()
         self.competitor_prices = self._initialize_competitor_prices()
         self.time_factors = self._initialize_time_factors()
+        self._build_arrays()
 
         self.state_size = self._calculate_state_size()
         self.action_size = self._calculate_action_size()
+        # Factored view of the action space: one price-level choice per product
+        self.num_price_levels = len(PRICE_LEVELS)
+        self.action_branches = self.num_products
+        # One preallocated state row, filled by _get_state()
+        self._state = np.empty((1, self.state_size))
+        self._bind_state_row()
         self.reset()
+
+    def _bind_state_row(self):
+        """Views of the state row's own-price, competitor-price, stock and demand entries"""
+        n, c = self.num_products, self.competitors
+        row = self._state[0]
+        self._state_parts = (
+            row[:n], row[n:n * (1 + c)].reshape(c, n), row[n * (1 + c) + 1:n * (2 + c) + 1], row[-n:]
+        )
+
+    def __setstate__(self, state):
+        # Copies and unpickled environments get fresh views of their own row
+        self.__dict__.update(state)
+        self._bind_state_row()
         
     def _initialize_products(self):
-        """Initialize product data with realistic attributes"""
-        product_names = [
-            "Premium Headphones", "Wireless Keyboard", "Smart Watch", 
-            "Bluetooth Speaker", "Gaming Mouse", "External SSD",
-            "Wireless Earbuds", "Mechanical Keyboard", "Webcam HD"
-        ]
-        
-        products = []
-        for i in range(min(self.num_products, len(product_names))):
-            base_price = random.uniform(50, 200)
-            products.append({
-                'id': i,
-                'name': product_names[i],
-                'base_price': base_price,
-                'current_price': base_price,
-                'cost': base_price * 0.6,
-                'stock': random.randint(50, 200),
-                'demand_elasticity': -1.2 - random.random() * 0.8,  # Between -1.2 and -2.0
-                'category': random.choice(['Audio', 'Computing', 'Wearable', 'Gaming', 'Storage']),
-                'quality': random.uniform(0.7, 1.0),
-                'seasonality': random.uniform(0.8, 1.2)
-            })
-        return products
+        """Draw the product catalog with realistic attributes"""
+        return ProductCatalog.generate(self.num_products, self.rng)
     
     def _initialize_customer_segments(self):
         """Initialize customer segments with different price sensitivities"""
         segments = []
         segment_names = ['Budget', 'Mainstream', 'Premium']
-        
-        for i in range(self.num_customer_segments):
-            name = segment_names[i] if i < len(segment_names) else f"Segment {i+1}"
-            if name == 'Budget':
-                price_sensitivity = random.uniform(1.5, 2.0)
-                quality_preference = random.uniform(0.3, 0.6)
-                size = random.uniform(0.4, 0.5)
-            elif name == 'Mainstream':
-                price_sensitivity = random.uniform(1.0, 1.5)
-                quality_preference = random.uniform(0.6, 0.8)
-                size = random.uniform(0.3, 0.4)
-            else:
-                price_sensitivity = random.uniform(0.5, 1.0)
-                quality_preference = random.uniform(0.8, 1.0)
-                size = random.uniform(0.1, 0.3)
-                
+        # (price sensitivity, quality preference, size) ranges per segment kind
+        ranges = {
+            'Budget': ((1.5, 2.0), (0.3, 0.6), (0.4, 0.5)),
+            'Mainstream': ((1.0, 1.5), (0.6, 0.8), (0.3, 0.4)),
+        }
+        premium = ((0.5, 1.0), (0.8, 1.0), (0.1, 0.3))
+
+        names = [segment_names[i] if i < len(segment_names) else f"Segment {i+1}"
+                 for i in range(self.num_customer_segments)]
+        bounds = np.array([ranges.get(name, premium) for name in names]).reshape(-1, 3, 2)
+        draws = self.rng.uniform(bounds[..., 0], bounds[..., 1])
+        loyalty = self.rng.uniform(0.1, 0.4, size=len(names))
+        sizes = draws[:, 2] / draws[:, 2].sum()  # Normalize segment sizes to sum to 1
+
+        for i, name in enumerate(names):
             segments.append({
                 'id': i,
                 'name': name,
-                'price_sensitivity': price_sensitivity,
-                'quality_preference': quality_preference,
-                'size': size,
-                'loyalty': random.uniform(0.1, 0.4)
+                'price_sensitivity': float(draws[i, 0]),
+                'quality_preference': float(draws[i, 1]),
+                'size': float(sizes[i]),
+                'loyalty': float(loyalty[i])
             })
-            
-        # Normalize segment sizes to sum to 1
-        total_size = sum(seg['size'] for seg in segments)
-        for seg in segments:
-            seg['size'] /= total_size
-            
         return segments
     
     def _initialize_competitor_prices(self):
         """Initialize competitor pricing strategies"""
-        competitor_prices = {}
-        for c in range(self.competitors):
-            competitor_prices[c] = {}
-            for product in self.products:
-                factor = random.uniform(0.9, 1.1)
-                competitor_prices[c][product['id']] = product['base_price'] * factor
-        return competitor_prices
+        # Shape (competitors, products), indexed by product position
+        factors = self.rng.uniform(0.9, 1.1, size=(self.competitors, self.num_products))
+        return self.catalog.base_prices * factors
     
     def _initialize_time_factors(self):
         """Initialize time-based factors affecting demand"""
-        factors = []
-        for t in range(self.time_periods):
-            hour = t % 24
-            if hour < 4:
-                f = random.uniform(0.7, 0.9)
-            elif hour < 8:
-                f = random.uniform(0.9, 1.1)
-            elif hour < 12:
-                f = random.uniform(1.0, 1.2)
-            elif hour < 16:
-                f = random.uniform(1.1, 1.3)
-            else:
-                f = random.uniform(0.5, 0.7)
-            factors.append(f)
-        return factors
-    
+        # Demand factor range for each block of the day: night, morning,
+        # late morning, afternoon and evening
+        hour = np.arange(self.time_periods) % 24
+        block = np.searchsorted([4, 8, 12, 16], hour, side='right')
+        low = np.array([0.7, 0.9, 1.0, 1.1, 0.5])[block]
+        high = np.array([0.9, 1.1, 1.2, 1.3, 0.7])[block]
+        return self.rng.uniform(low, high)
+
+    def _build_arrays(self):
+        """Hold product and segment attributes as arrays for the demand kernel"""
+        catalog = self.catalog
+        self.base_prices = catalog.base_prices
+        self.current_prices = self.base_prices.copy()
+        self.costs = catalog.costs
+        self.stocks = self._initial_stocks.copy()
+        self.qualities = catalog.qualities
+        self.seasonalities = catalog.seasonalities
+        self.product_ids = catalog.ids.tolist()
+
+        segments = self.customer_segments
+        self.segment_sizes = np.array([s['size'] for s in segments])
+        self.segment_price_sensitivity = np.array([s['price_sensitivity'] for s in segments])
+        self.segment_quality_preference = np.array([s['quality_preference'] for s in segments])
+        self.segment_loyalty = np.array([s['loyalty'] for s in segments])
+
+        # Every step only looks up the demand of its price levels; see _price_level_demand
+        self._level_demand = _price_level_demand(
+            self.segment_sizes, self.qualities, self.seasonalities,
+            self.segment_price_sensitivity, self.segment_quality_preference
+        )
+        self._level_columns = np.arange(self.num_products) * len(PRICE_LEVELS)
+        # Price and unit cost of every (product, price level), rows indexed like _level_demand's columns
+        self._level_price_cost = np.stack([
+            (self.base_prices[:, None] * _PRICE_FACTORS).ravel(), np.repeat(self.costs, len(PRICE_LEVELS))
+        ], axis=1)
+        # Price relative to base and satisfaction side of every (product, price level)
+        self._level_ratios = (self._level_price_cost[:, 0].reshape(self.num_products, -1)
+                              / self.base_prices[:, None]).ravel()
+        self._level_sides = _price_sides(self._level_ratios)
+        self._level_place_values = None
+        if self.num_products <= MAX_JOINT_PRODUCTS:
+            self._level_place_values = _joint_place_values(self.num_products)
+        self._decode_table = None
+        if 5 ** self.num_products <= _MAX_DECODE_TABLE:
+            joint = np.arange(5 ** self.num_products)
+            self._decode_table = (joint[:, None] // self._level_place_values) % 5
+        self.price_levels = np.full(self.num_products, BASE_LEVEL, dtype=np.int64)
+        # The step's uniform draws become competitor price adjustments of
+        # +/-5% in the first rows and demand factors of 0.9-1.1 in the rest
+        self._noise_scale = np.repeat([0.1, 0.2], [self.competitors, len(segments)])[:, None]
+        self._noise_offset = np.repeat([-0.05, 0.9], [self.competitors, len(segments)])[:, None]
+
     def _calculate_state_size(self):
         """Calculate the size of the state space"""
         # prices + competitor prices + time + stock + recent demand
@@ -122,183 +230,147 @@ class MarketEnvironment:
         # 5 discrete price levels per product
         return 5 ** self.num_products
     
-    def reset(self):
+    def reset(self, seed=None):
         """Reset the environment to initial state (including restocking)"""
+        # Reseeding makes the episode's noise reproducible
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
         self.current_time = 0
         self.total_profit = 0
-        self.recent_demand = {p['id']: 0 for p in self.products}
+        self.recent_demand = np.zeros(self.num_products, dtype=np.int64)
         self.customer_satisfaction = 0.5
         
         # Restore each product’s price and **stock**
-        for idx, product in enumerate(self.products):
-            product['current_price'] = product['base_price']
-            product['stock']         = self._initial_stocks[idx]
+        self.current_prices[:] = self.base_prices
+        self.price_levels[:] = BASE_LEVEL
+        self.stocks[:] = self._initial_stocks
             
         # Re‑randomize competitor prices
-        for c in range(self.competitors):
-            for product in self.products:
-                adj = random.uniform(-0.05, 0.05)
-                ratio = product['current_price'] / product['base_price']
-                self.competitor_prices[c][product['id']] = product['base_price'] * (ratio + adj)
-                
+        ratio = self.current_prices / self.base_prices
+        adj = self.rng.uniform(-0.05, 0.05, size=self.competitor_prices.shape)
+        self.competitor_prices = self.base_prices * (ratio + adj)
         return self._get_state()
     
     def _get_state(self):
         """Get the current state representation"""
-        state = []
-        # normalized own prices
-        for p in self.products:
-            state.append(p['current_price'] / p['base_price'])
-        # normalized competitor prices
-        for c in range(self.competitors):
-            for p in self.products:
-                state.append(self.competitor_prices[c][p['id']] / p['base_price'])
-        # time, stock, recent demand
-        state.append(self.current_time / self.time_periods)
-        for p in self.products:
-            state.append(min(1.0, p['stock'] / 100))
-        for _, d in self.recent_demand.items():
-            state.append(min(1.0, d / 50))
-        return np.array([state])
+        # Written into the preallocated row; _finish_state returns a copy
+        prices, competitors, _, _ = self._state_parts
+        # normalized own and competitor prices
+        np.divide(self.current_prices, self.base_prices, out=prices)
+        np.divide(self.competitor_prices, self.base_prices, out=competitors)
+        return self._finish_state()
+
+    def _finish_state(self):
+        """Write time, stock and recent demand into the state row and return a copy of it"""
+        _, _, stock, demand = self._state_parts
+        self._state[0, self.num_products * (1 + self.competitors)] = self.current_time / self.time_periods
+        np.divide(self.stocks, 100, out=stock)
+        np.divide(self.recent_demand, 50, out=demand)
+        # Stock and demand are adjacent: clip both at 1 in one pass
+        tail = self._state[0, self.num_products * (1 + self.competitors) + 1:]
+        np.minimum(tail, 1.0, out=tail)
+        return self._state.copy()
     
     # ... rest of class unchanged (step, get_products, get_customer_segments, etc.) ...
 
     
+    def prices_to_levels(self, prices):
+        """Nearest price-level index per product for a (..., products) price array"""
+        return _nearest_price_levels(prices, self.base_prices)
+
     def _price_to_action(self, prices):
         """Convert price adjustments to a single action index"""
         # This is a simplified version - in a real system, you'd need a more sophisticated mapping
-        price_levels = [-0.1, -0.05, 0, 0.05, 0.1]  # -10%, -5%, 0%, +5%, +10%
-        
-        # Find the closest price level for each product
-        price_indices = []
-        for i, product in enumerate(self.products):
-            price_ratio = prices[i] / product['base_price'] - 1.0  # Convert to percentage change
-            closest_idx = min(range(len(price_levels)), key=lambda j: abs(price_levels[j] - price_ratio))
-            price_indices.append(closest_idx)
-            
-        # Convert multi-dimensional action to a single index
-        action_idx = 0
-        for i, idx in enumerate(price_indices):
-            action_idx += idx * (5 ** i)
-            
-        return action_idx
+        return self.encode_action(self.prices_to_levels(prices))
     
+    def encode_action(self, price_indices):
+        """Convert per-product price-level indices to a single action index"""
+        return int(np.dot(np.asarray(price_indices, dtype=np.int64), _joint_place_values(len(price_indices))))
+
+    def decode_action(self, action):
+        """Convert a single action index to per-product price-level indices"""
+        if self._decode_table is not None:
+            return self._decode_table[int(action)]
+        place_values = self._level_place_values
+        if place_values is None:
+            # Raises: the catalog has too many products for joint indices
+            place_values = _joint_place_values(self.num_products)
+        return (int(action) // place_values) % 5
+
+    def levels_to_prices(self, actions):
+        """Prices for a batch of actions: N joint indices or an (N, products) level array"""
+        actions = np.asarray(actions, dtype=np.int64)
+        if actions.ndim == 1:
+            actions = (actions[:, None] // _joint_place_values(self.num_products)) % 5
+        return self.base_prices * (1 + PRICE_LEVELS[actions])
+
     def _action_to_prices(self, action):
-        """Convert a single action index to price adjustments"""
-        price_levels = [-0.1, -0.05, 0, 0.05, 0.1]  # -10%, -5%, 0%, +5%, +10%
-        
-        # Convert action index to multi-dimensional action
-        price_indices = []
-        temp_action = action
-        for i in range(self.num_products):
-            price_indices.append(temp_action % 5)
-            temp_action //= 5
+        """Convert a joint action index or per-product price levels to price adjustments"""
+        if np.ndim(action) == 0:
+            price_indices = self.decode_action(action)
+        else:
+            price_indices = np.asarray(action, dtype=np.int64)
             
         # Apply price adjustments
-        new_prices = []
-        for i, product in enumerate(self.products):
-            if i < len(price_indices):
-                price_adjustment = price_levels[price_indices[i]]
-                new_price = product['base_price'] * (1 + price_adjustment)
-                new_prices.append(new_price)
-            else:
-                new_prices.append(product['current_price'])
-                
+        new_prices = self.current_prices.copy()
+        n = min(len(new_prices), len(price_indices))
+        new_prices[:n] = self.base_prices[:n] * (1 + PRICE_LEVELS[price_indices[:n]])
         return new_prices
     
+    def _apply_action(self, action):
+        """Set price levels and current prices from an action and return their level-table columns"""
+        if isinstance(action, (int, np.integer)) or np.ndim(action) == 0:
+            price_indices = self.decode_action(action)
+        else:
+            price_indices = np.asarray(action, dtype=np.int64)
+        if len(price_indices) == self.num_products:
+            np.copyto(self.price_levels, price_indices)
+        else:
+            n = min(self.num_products, len(price_indices))
+            self.price_levels[:n] = price_indices[:n]
+        columns = self._level_columns + self.price_levels
+        self._level_price_cost[:, 0].take(columns, out=self.current_prices)
+        return columns
+
     def step(self, action):
         """Take a step in the environment with the given action"""
-        # Convert action to price adjustments
-        new_prices = self._action_to_prices(action)
+        # Convert action to price adjustments and update product prices
+        columns = self._apply_action(action)
+        price_ratio = self._level_ratios.take(columns, out=self._state_parts[0])
+        prices = self.current_prices
+        base = self.base_prices
+        competitor_state = self._state_parts[1]
         
-        # Update product prices
-        for i, product in enumerate(self.products):
-            if i < len(new_prices):
-                product['current_price'] = new_prices[i]
-                
-        # Calculate demand and revenue
-        total_revenue = 0
-        total_cost = 0
+        # One draw for all of the step's noise: competitor adjustments for
+        # the first rows, demand noise per (segment, product) for the rest
+        noise = self.rng.random(self._noise_scale.shape[:1] + (self.num_products,))
+        noise *= self._noise_scale
+        noise += self._noise_offset
+
+        # Update competitor prices with some randomness: competitors adjust
+        # prices based on our prices, shape (competitors, products). Their
+        # ratio to base goes straight into the state row.
+        np.add(price_ratio, noise[:self.competitors], out=competitor_state)
+        self.competitor_prices = base * competitor_state
+
+        time_effect = self.time_factors[self.current_time % len(self.time_factors)]
+        product_demand = _product_demand(
+            prices, self.competitor_prices, self.stocks,
+            self._level_demand.take(columns, axis=1),
+            self.segment_loyalty * (time_effect * self.customer_satisfaction) + time_effect,
+            noise[self.competitors:]
+        )
+        self.stocks -= product_demand
+        self.recent_demand = product_demand
         
-        # Update competitor prices with some randomness
-        for competitor in range(self.competitors):
-            for product in self.products:
-                # Competitors adjust prices based on our prices and some randomness
-                competitor_adjustment = random.uniform(-0.05, 0.05)
-                price_ratio = product['current_price'] / product['base_price']
-                self.competitor_prices[competitor][product['id']] = product['base_price'] * (price_ratio + competitor_adjustment)
-                
-        # Calculate demand for each product from each customer segment
-        for product in self.products:
-            product_demand = 0
-            
-            for segment in self.customer_segments:
-                # Base demand depends on segment size
-                base_segment_demand = 100 * segment['size']
-                
-                # Price sensitivity effect
-                own_price_effect = (product['base_price'] / product['current_price']) ** segment['price_sensitivity']
-                
-                # Competitor price effect
-                competitor_price_effect = 1.0
-                for competitor in range(self.competitors):
-                    competitor_price = self.competitor_prices[competitor][product['id']]
-                    if competitor_price < product['current_price']:
-                        # Lower competitor prices reduce our demand
-                        price_diff_ratio = competitor_price / product['current_price']
-                        competitor_price_effect *= 0.5 + 0.5 * price_diff_ratio
-                
-                # Quality preference effect
-                quality_effect = 0.5 + 0.5 * (product['quality'] ** segment['quality_preference'])
-                
-                # Time of day effect
-                time_effect = self.time_factors[self.current_time % len(self.time_factors)]
-                
-                # Customer satisfaction and loyalty effect
-                loyalty_effect = 1.0 + segment['loyalty'] * self.customer_satisfaction
-                
-                # Seasonality effect
-                seasonality_effect = product['seasonality']
-                
-                # Calculate segment demand for this product
-                segment_demand = base_segment_demand * own_price_effect * competitor_price_effect * quality_effect * time_effect * loyalty_effect * seasonality_effect
-                
-                # Add randomness
-                segment_demand *= random.uniform(0.9, 1.1)
-                
-                # Add to total product demand
-                product_demand += segment_demand
-                
-            # Ensure demand doesn't exceed stock
-            product_demand = min(product_demand, product['stock'])
-            product_demand = max(0, int(product_demand))
-            
-            # Update product stock
-            product['stock'] -= product_demand
-            
-            # Update recent demand
-            self.recent_demand[product['id']] = product_demand
-            
-            # Calculate revenue and cost
-            product_revenue = product_demand * product['current_price']
-            product_cost = product_demand * product['cost']
-            
-            total_revenue += product_revenue
-            total_cost += product_cost
-            
-        # Calculate profit
+        # Calculate revenue, cost and profit
+        total_revenue, total_cost = (product_demand @ self._level_price_cost.take(columns, axis=0)).tolist()
         profit = total_revenue - total_cost
         self.total_profit += profit
         
         # Update customer satisfaction based on pricing
-        price_satisfaction = 0
-        for product in self.products:
-            price_ratio = product['current_price'] / product['base_price']
-            if price_ratio < 0.9:  # Customers like lower prices
-                price_satisfaction += 0.1
-            elif price_ratio > 1.1:  # Customers dislike higher prices
-                price_satisfaction -= 0.1
-                
+        price_satisfaction = 0.1 * int(np.add.reduce(self._level_sides.take(columns)))
+
         # Adjust overall satisfaction (with some memory of previous satisfaction)
         self.customer_satisfaction = 0.8 * self.customer_satisfaction + 0.2 * (0.5 + price_satisfaction)
         self.customer_satisfaction = max(0, min(1, self.customer_satisfaction))
@@ -310,8 +382,8 @@ class MarketEnvironment:
         # Calculate reward (profit)
         reward = profit
         
-        # Get next state
-        next_state = self._get_state()
+        # Get next state; step() already wrote its price entries
+        next_state = self._finish_state()
         
         # Additional info
         info = {
@@ -320,15 +392,169 @@ class MarketEnvironment:
             'profit': profit,
             'total_profit': self.total_profit,
             'customer_satisfaction': self.customer_satisfaction,
-            'demand': self.recent_demand
+            # Units sold per product, in product_ids order
+            'demand': product_demand
         }
         
         return next_state, reward, done, info
     
-    def get_products(self):
-        """Return the current product data"""
-        return self.products
+    def get_products(self, offset=0, limit=None):
+        """Return the current product data, optionally one page of it"""
+        return self.catalog.records(self.current_prices, self.stocks, offset, limit)
     
     def get_customer_segments(self):
         """Return the customer segment data"""
         return self.customer_segments
+
+
+class VectorMarketEnvironment:
+    """N independent markets stepped in lockstep as one batched computation.
+
+    Every market keeps its own products, segments, competitors and time
+    factors; their attributes are stacked along a leading market axis so a
+    step is a single broadcast over all of them. All markets must share the
+    same product, segment, competitor and time-period counts.
+
+    Per-step noise for all markets is drawn in one call from the vector
+    environment's own generator (self.rng, seeded with seed or by
+    reset(seed=...)).
+    """
+
+    def __init__(self, num_envs=8, num_products=5, num_customer_segments=3, time_periods=24, competitors=2,
+                 envs=None, seed=None):
+        seed_seq = np.random.SeedSequence(seed)
+        market_seeds = seed_seq.spawn(num_envs if envs is None else 0)
+        self.rng = np.random.default_rng(seed_seq)
+        if envs is None:
+            envs = [
+                MarketEnvironment(num_products, num_customer_segments, time_periods, competitors, seed=s)
+                for s in market_seeds
+            ]
+        self.envs = list(envs)
+        if not self.envs:
+            raise ValueError("VectorMarketEnvironment needs at least one market")
+
+        first = self.envs[0]
+        for e in self.envs[1:]:
+            if (e.state_size, e.num_products, len(e.customer_segments), e.competitors, e.time_periods) != \
+                    (first.state_size, first.num_products, len(first.customer_segments), first.competitors, first.time_periods):
+                raise ValueError("All markets in a VectorMarketEnvironment must have the same shape")
+
+        self.num_envs = len(self.envs)
+        self.num_products = first.num_products
+        self.competitors = first.competitors
+        self.time_periods = first.time_periods
+        self.state_size = first.state_size
+        self.action_size = first.action_size
+        self.num_price_levels = first.num_price_levels
+        self.action_branches = first.action_branches
+
+        # Static attributes, shape (num_envs, ...)
+        self.base_prices = np.stack([e.base_prices for e in self.envs])
+        self.costs = np.stack([e.costs for e in self.envs])
+        self.qualities = np.stack([e.qualities for e in self.envs])
+        self.seasonalities = np.stack([e.seasonalities for e in self.envs])
+        self.time_factors = np.stack([e.time_factors for e in self.envs])
+        self.segment_sizes = np.stack([e.segment_sizes for e in self.envs])
+        self.segment_price_sensitivity = np.stack([e.segment_price_sensitivity for e in self.envs])
+        self.segment_quality_preference = np.stack([e.segment_quality_preference for e in self.envs])
+        self.segment_loyalty = np.stack([e.segment_loyalty for e in self.envs])
+        self._initial_stocks = np.stack([e._initial_stocks for e in self.envs])
+        self.competitor_prices = np.stack([e.competitor_prices for e in self.envs])
+        self._level_demand = np.stack([e._level_demand for e in self.envs])
+        self._level_columns = first._level_columns
+
+        self.reset()
+
+    @classmethod
+    def replicate(cls, env, num_envs, seed=None):
+        """Build N copies of one market that differ only in their noise"""
+        return cls(envs=[copy.deepcopy(env) for _ in range(num_envs)], seed=seed)
+
+    def reset(self, seed=None):
+        """Reset every market, reseeding the generator if seed is given, and return the stacked states"""
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.current_time = 0
+        self.total_profit = np.zeros(self.num_envs)
+        self.current_prices = self.base_prices.copy()
+        self.price_levels = np.full(self.base_prices.shape, BASE_LEVEL, dtype=np.int64)
+        self.stocks = self._initial_stocks.copy()
+        self.recent_demand = np.zeros_like(self.stocks)
+        self.customer_satisfaction = np.full(self.num_envs, 0.5)
+
+        adj = self.rng.uniform(-0.05, 0.05, size=self.competitor_prices.shape)
+        self.competitor_prices = self.base_prices[:, None, :] * (1.0 + adj)
+        return self._get_states()
+
+    def _get_states(self):
+        """Get the stacked state representation of all markets"""
+        n = self.num_envs
+        return np.concatenate([
+            self.current_prices / self.base_prices,
+            (self.competitor_prices / self.base_prices[:, None, :]).reshape(n, -1),
+            np.full((n, 1), self.current_time / self.time_periods),
+            np.minimum(1.0, self.stocks / 100),
+            np.minimum(1.0, self.recent_demand / 50),
+        ], axis=1)
+
+    def _actions_to_levels(self, actions):
+        """Convert N joint action indices or an (N, products) level array to an (N, products) level array"""
+        actions = np.asarray(actions, dtype=np.int64)
+        if actions.ndim == 1:
+            return (actions[:, None] // _joint_place_values(self.num_products)) % 5
+        return actions
+
+    def prices_to_levels(self, prices):
+        """Nearest price-level indices for an (N, products) price array"""
+        return _nearest_price_levels(prices, self.base_prices)
+
+    def step(self, actions):
+        """Step all markets with an array of N actions.
+
+        Returns stacked states (N, state_size), rewards (N,), dones (N,) and
+        an infos dict whose entries are arrays with a leading N axis.
+        """
+        self.price_levels = self._actions_to_levels(actions)
+        self.current_prices = self.base_prices * (1 + PRICE_LEVELS[self.price_levels])
+        prices = self.current_prices
+        base = self.base_prices
+        price_ratio = prices / base
+
+        # All markets' competitor adjustments and demand noise in one draw
+        noise = self.rng.random((self.num_envs, self.competitors + self.segment_sizes.shape[1], self.num_products))
+        competitor_adjustment = noise[:, :self.competitors] * 0.1 - 0.05
+        self.competitor_prices = base[:, None, :] * (price_ratio[:, None, :] + competitor_adjustment)
+
+        time_effect = self.time_factors[:, self.current_time % self.time_factors.shape[1]]
+        columns = (self._level_columns + self.price_levels)[:, None, :]
+        product_demand = _product_demand(
+            prices, self.competitor_prices, self.stocks, np.take_along_axis(self._level_demand, columns, axis=2),
+            time_effect[:, None] * (1.0 + self.segment_loyalty * self.customer_satisfaction[:, None]),
+            0.9 + 0.2 * noise[:, self.competitors:]
+        )
+        self.stocks -= product_demand
+        self.recent_demand = product_demand
+
+        revenue = np.einsum('np,np->n', product_demand, prices)
+        cost = np.einsum('np,np->n', product_demand, self.costs)
+        profit = revenue - cost
+        self.total_profit += profit
+
+        price_satisfaction = 0.1 * _price_sides(price_ratio).sum(axis=1)
+        self.customer_satisfaction = np.clip(
+            0.8 * self.customer_satisfaction + 0.2 * (0.5 + price_satisfaction), 0, 1
+        )
+
+        self.current_time += 1
+        dones = np.full(self.num_envs, self.current_time >= self.time_periods)
+
+        infos = {
+            'revenue': revenue,
+            'cost': cost,
+            'profit': profit,
+            'total_profit': self.total_profit.copy(),
+            'customer_satisfaction': self.customer_satisfaction.copy(),
+            'demand': product_demand
+        }
+        return self._get_states(), profit, dones, infos
@@ -1,56 +1,238 @@
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, Input
-from tensorflow.keras.optimizers import Adam
+
+class RewardSeries:
+    """Per-episode rewards in a preallocated, growable float array with a running total.
+
+    A second array alongside holds the running total after every stored
+    episode, so cumulative() is a slice rather than a sum over the prefix.
+
+    Episodes are addressed by their absolute index. With keep_recent set,
+    only the latest keep_recent to keep_recent + bucket_size episodes stay
+    at full resolution; older ones are folded into per-bucket means, and
+    when max_buckets is reached neighbouring buckets are merged, so memory
+    stays bounded however long the run.
+    """
+
+    def __init__(self, keep_recent=None, bucket_size=100, max_buckets=1000, capacity=1024):
+        self.keep_recent = keep_recent
+        self.bucket_size = bucket_size
+        self.max_buckets = max_buckets
+        if keep_recent is not None:
+            capacity = keep_recent + bucket_size
+        self._values = np.empty(capacity)
+        self._cumulative = np.empty(capacity)
+        self._len = 0
+        self.offset = 0  # absolute index of the first full-resolution episode
+        self.count = 0
+        self.total = 0.0
+        self._total_before = 0.0  # sum of the episodes before offset
+        self._bucket_starts = np.empty(max_buckets, dtype=np.int64)
+        self._bucket_counts = np.empty(max_buckets, dtype=np.int64)
+        self._bucket_means = np.empty(max_buckets)
+        self._num_buckets = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        if self._len == len(self._values):
+            if self.keep_recent is None:
+                self._values = self._grown(self._values, 2 * len(self._values))
+                self._cumulative = self._grown(self._cumulative, len(self._values))
+            else:
+                self._fold_oldest()
+        self.total += value
+        self._values[self._len] = value
+        self._cumulative[self._len] = self.total
+        self._len += 1
+        self.count += 1
+
+    def _grown(self, array, capacity):
+        """A copy of array's stored prefix in a new array of length capacity"""
+        grown = np.empty(capacity)
+        grown[:self._len] = array[:self._len]
+        return grown
+
+    def _fold_oldest(self):
+        """Move the oldest bucket_size full-resolution episodes into a bucket"""
+        n = self.bucket_size
+        oldest = self._values[:n]
+        if self._num_buckets == self.max_buckets:
+            # Halve the resolution of the aggregates: merge neighbouring pairs
+            k = self._num_buckets // 2 * 2
+            counts = self._bucket_counts[:k].reshape(-1, 2)
+            sums = (self._bucket_means[:k] * self._bucket_counts[:k]).reshape(-1, 2).sum(axis=1)
+            merged = k // 2
+            self._bucket_starts[:merged] = self._bucket_starts[:k:2]
+            self._bucket_counts[:merged] = counts.sum(axis=1)
+            self._bucket_means[:merged] = sums / self._bucket_counts[:merged]
+            if k < self._num_buckets:
+                self._bucket_starts[merged] = self._bucket_starts[k]
+                self._bucket_counts[merged] = self._bucket_counts[k]
+                self._bucket_means[merged] = self._bucket_means[k]
+                merged += 1
+            self._num_buckets = merged
+        i = self._num_buckets
+        self._bucket_starts[i] = self.offset
+        self._bucket_counts[i] = n
+        self._bucket_means[i] = oldest.mean()
+        self._num_buckets += 1
+
+        # Running totals are absolute, so the kept ones just move down
+        self._total_before = float(self._cumulative[n - 1])
+        self._values[:self._len - n] = self._values[n:self._len]
+        self._cumulative[:self._len - n] = self._cumulative[n:self._len]
+        self._len -= n
+        self.offset += n
+
+    def values(self, since=0, end=None):
+        """Full-resolution rewards of episodes [since, end), as a view; episodes folded into buckets are skipped"""
+        start = max(since - self.offset, 0)
+        stop = self._len if end is None else min(max(end - self.offset, 0), self._len)
+        return self._values[start:max(start, stop)]
+
+    def cumulative(self, since=0, end=None):
+        """Running totals matching values(since, end), as a view"""
+        start = max(since - self.offset, 0)
+        stop = self._len if end is None else min(max(end - self.offset, 0), self._len)
+        return self._cumulative[start:max(start, stop)]
+
+    def last(self):
+        return float(self._values[self._len - 1]) if self._len else None
+
+    def mean_last(self, n):
+        return float(self._values[max(self._len - n, 0):self._len].mean()) if self._len else 0.0
+
+    def first_episode(self, since=0):
+        """Absolute index of the first episode values(since) returns"""
+        return max(since, self.offset)
+
+    def snapshot(self):
+        """Copies of the stored rewards and aggregates ('arrays') and the running totals ('meta')"""
+        n = self._num_buckets
+        return {
+            "arrays": {
+                "values": self._values[:self._len].copy(),
+                "cumulative": self._cumulative[:self._len].copy(),
+                "bucket_starts": self._bucket_starts[:n].copy(),
+                "bucket_counts": self._bucket_counts[:n].copy(),
+                "bucket_means": self._bucket_means[:n].copy(),
+            },
+            "meta": {"offset": self.offset, "count": self.count, "total": self.total,
+                     "total_before": self._total_before}
+        }
+
+    def restore(self, snapshot):
+        """Load a snapshot() taken with the same retention settings"""
+        arrays, meta = snapshot["arrays"], snapshot["meta"]
+        n = len(arrays["values"])
+        if n > len(self._values):
+            self._values = np.empty(2 * n)
+            self._cumulative = np.empty(2 * n)
+        self._values[:n] = arrays["values"]
+        self._cumulative[:n] = arrays["cumulative"]
+        self._len = n
+        b = len(arrays["bucket_means"])
+        self._bucket_starts[:b] = arrays["bucket_starts"]
+        self._bucket_counts[:b] = arrays["bucket_counts"]
+        self._bucket_means[:b] = arrays["bucket_means"]
+        self._num_buckets = b
+        self.offset = meta["offset"]
+        self.count = meta["count"]
+        self.total = meta["total"]
+        self._total_before = meta["total_before"]
+
+    def buckets(self):
+        """Downsampled history of the folded episodes: start episode, episode count and mean reward per bucket"""
+        n = self._num_buckets
+        return {
+            'start_episodes': self._bucket_starts[:n].tolist(),
+            'episode_counts': self._bucket_counts[:n].tolist(),
+            'mean_rewards': self._bucket_means[:n].tolist()
+        }
+
 
 class EnhancedRewardSystem:
-    def __init__(self, baseline_comparison=True, baseline_strategy='combined'):
+    """Agent and baseline episode rewards and how they compare.
+
+    Rewards are kept in RewardSeries with running totals, so summaries cost
+    O(1) however many episodes have been recorded. keep_recent, bucket_size
+    and max_buckets set an optional retention policy (see RewardSeries).
+    """
+
+    def __init__(self, baseline_comparison=True, baseline_strategy='combined',
+                 keep_recent=None, bucket_size=100, max_buckets=1000):
         self.baseline_comparison = baseline_comparison
         self.baseline_strategy = baseline_strategy
-        self.baseline_rewards = []
-        self.agent_rewards = []
-        self.cumulative_baseline_rewards = []
-        self.cumulative_agent_rewards = []
+        self._retention = dict(keep_recent=keep_recent, bucket_size=bucket_size, max_buckets=max_buckets)
+        self.agent = RewardSeries(**self._retention)
+        self.baseline = RewardSeries(**self._retention)
+        # Bumped on every change; lets callers cache or ETag derived results
+        self.version = 0
+
+    # Full-resolution histories as array views, for callers that index them
+    @property
+    def agent_rewards(self):
+        return self.agent.values()
+
+    @property
+    def baseline_rewards(self):
+        return self.baseline.values()
+
+    @property
+    def cumulative_agent_rewards(self):
+        return self.agent.cumulative()
+
+    @property
+    def cumulative_baseline_rewards(self):
+        return self.baseline.cumulative()
         
     def reset(self):
         """Reset the reward system"""
-        self.baseline_rewards = []
-        self.agent_rewards = []
-        self.cumulative_baseline_rewards = []
-        self.cumulative_agent_rewards = []
+        self.agent = RewardSeries(**self._retention)
+        self.baseline = RewardSeries(**self._retention)
+        self.version += 1
         
+    def snapshot(self):
+        """Both series as one snapshot, for checkpoints"""
+        agent, baseline = self.agent.snapshot(), self.baseline.snapshot()
+        return {
+            "arrays": dict(
+                {f"agent/{k}": v for k, v in agent["arrays"].items()},
+                **{f"baseline/{k}": v for k, v in baseline["arrays"].items()}
+            ),
+            "meta": {"agent": agent["meta"], "baseline": baseline["meta"]}
+        }
+
+    def restore(self, snapshot):
+        """Replace both series with a snapshot()"""
+        for name in ("agent", "baseline"):
+            series = RewardSeries(**self._retention)
+            series.restore({
+                "arrays": {k.split('/', 1)[1]: v for k, v in snapshot["arrays"].items() if k.startswith(name + '/')},
+                "meta": snapshot["meta"][name]
+            })
+            setattr(self, name, series)
+        self.version += 1
+
     def add_baseline_reward(self, reward):
         """Add a baseline reward"""
-        self.baseline_rewards.append(reward)
-        
-        # Update cumulative rewards
-        if not self.cumulative_baseline_rewards:
-            self.cumulative_baseline_rewards.append(reward)
-        else:
-            self.cumulative_baseline_rewards.append(
-                self.cumulative_baseline_rewards[-1] + reward
-            )
+        self.baseline.append(reward)
+        self.version += 1
             
     def add_agent_reward(self, reward):
         """Add an agent reward"""
-        self.agent_rewards.append(reward)
-        
-        # Update cumulative rewards
-        if not self.cumulative_agent_rewards:
-            self.cumulative_agent_rewards.append(reward)
-        else:
-            self.cumulative_agent_rewards.append(
-                self.cumulative_agent_rewards[-1] + reward
-            )
+        self.agent.append(reward)
+        self.version += 1
             
     def get_improvement_percentage(self):
         """Calculate the percentage improvement of agent over baseline"""
-        if not self.baseline_rewards or not self.agent_rewards:
+        if not self.baseline.count or not self.agent.count:
             return 0.0
             
-        total_baseline = sum(self.baseline_rewards)
-        total_agent = sum(self.agent_rewards)
+        # The series keep running totals
+        total_baseline = self.baseline.total
+        total_agent = self.agent.total
         
         if total_baseline <= 0:
             return 0.0  # Avoid division by zero or negative percentages
@@ -58,15 +240,27 @@ class EnhancedRewardSystem:
         improvement = ((total_agent - total_baseline) / abs(total_baseline)) * 100
         return improvement
         
-    def get_reward_history(self):
-        """Get the reward history for both agent and baseline"""
-        return {
-            'agent_rewards': self.agent_rewards,
-            'baseline_rewards': self.baseline_rewards,
-            'cumulative_agent_rewards': self.cumulative_agent_rewards,
-            'cumulative_baseline_rewards': self.cumulative_baseline_rewards,
+    def get_reward_history(self, since=0, limit=None):
+        """Get the reward history for both agent and baseline.
+
+        since/limit select episodes [since, since + limit) so callers can
+        fetch only what they have not seen yet. With a retention policy,
+        episodes already folded into buckets are left out of the lists
+        (history_start says where they begin) and summarised under
+        downsampled instead.
+        """
+        end = None if limit is None else since + limit
+        history = {
+            'agent_rewards': self.agent.values(since, end).tolist(),
+            'baseline_rewards': self.baseline.values(since, end).tolist(),
+            'cumulative_agent_rewards': self.agent.cumulative(since, end).tolist(),
+            'cumulative_baseline_rewards': self.baseline.cumulative(since, end).tolist(),
             'improvement_percentage': self.get_improvement_percentage()
         }
+        if self._retention['keep_recent'] is not None:
+            history['history_start'] = self.agent.first_episode(since)
+            history['downsampled'] = {'agent': self.agent.buckets(), 'baseline': self.baseline.buckets()}
+        return history
         
     def calculate_enhanced_reward(self, reward, baseline_reward=None):
         """Calculate an enhanced reward that includes comparison to baseline"""
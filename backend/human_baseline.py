@@ -1,216 +1,227 @@
 import numpy as np
-import pandas as pd
-from enhanced_env import MarketEnvironment
+from enhanced_env import MarketEnvironment, _nearest_price_levels
+
+# Time-of-day price factor for every hour: discount 0-3, standard 4-7,
+# slightly higher 8-11, peak 12-15 and discount again from 16
+HOUR_FACTORS = np.array([0.95] * 4 + [1.0] * 4 + [1.05] * 4 + [1.15] * 4 + [0.9] * 8)
+# Last demand buckets: low (up to 15), medium (up to 30) and high, as
+# given by DEMAND_THRESHOLDS.searchsorted(demand)
+DEMAND_THRESHOLDS = np.array([15, 30])
+# Price factor of each demand bucket; the first row applies before the
+# first step, when there is no demand history yet
+ADAPTIVE_DEMAND_FACTORS = np.array([[1.05, 1.05, 1.05], [0.95, 1.05, 1.15]])
+COMBINED_DEMAND_FACTORS = np.array([[1.0, 1.0, 1.0], [0.95, 1.02, 1.1]])
 
 class HumanBaseline:
     def __init__(self, env, strategy='combined'):
         self.env = env
         self.strategy = strategy  # 'fixed', 'adaptive', 'time', or 'combined'
-        self.products = env.get_products()
+        self.product_ids = env.product_ids
         self.customer_segments = env.get_customer_segments()
-        self.price_history = {p['id']: [] for p in self.products}
-        self.demand_history = {p['id']: [] for p in self.products}
-        self.revenue_history = []
-        self.profit_history = []
+        self.reset()
         
     def reset(self):
-        """Reset the baseline strategy"""
-        self.price_history = {p['id']: [] for p in self.products}
-        self.demand_history = {p['id']: [] for p in self.products}
-        self.revenue_history = []
-        self.profit_history = []
+        """Reset the baseline strategy.
+
+        The episode's history is kept in arrays with one row per step,
+        (steps, products) for prices and demand; run_episode fills the
+        first self.steps rows.
+        """
+        periods, n = self.env.time_periods, self.env.num_products
+        self.steps = 0
+        self.price_history = np.empty((periods, n))
+        self.demand_history = np.empty((periods, n), dtype=np.int64)
+        self.revenue_history = np.empty(periods)
+        self.profit_history = np.empty(periods)
         
+    def _state_features(self, states):
+        """Pull hour, competitor prices and last demand out of (..., state_size) states.
+
+        Works on a single state row or a batch. Returns the time period and
+        whether a step has been taken yet, both (..., 1) so they broadcast
+        against per-product arrays, competitor prices relative to base
+        (..., competitors, products) and the (..., products) bucket of the
+        last demand (see DEMAND_THRESHOLDS).
+
+        The state's demand entries are min(1, demand / 50) of integer
+        demands, so rounding recovers the demand exactly below 50 and
+        anything clipped is above every demand threshold used here.
+        """
+        n, c = self.env.num_products, self.env.competitors
+        current_time = self._state_time(states)
+        competitor_ratios = states[..., n:n * (1 + c)].reshape(states.shape[:-1] + (c, n))
+        demand_bucket = DEMAND_THRESHOLDS.searchsorted(np.rint(states[..., -n:] * 50))
+        # Demand history only exists once a step has been taken
+        has_history = np.minimum(current_time, 1)
+        return current_time, competitor_ratios, demand_bucket, has_history
+
+    def _state_time(self, states):
+        """(..., 1) time period of (..., state_size) states"""
+        t = self.env.num_products * (1 + self.env.competitors)
+        return (states[..., t:t + 1] * self.env.time_periods).astype(np.int64)
+
+    def fixed_pricing_batch(self, states, base_prices=None):
+        """Fixed pricing for a batch of states - 10% markup from base price"""
+        base = self.env.base_prices if base_prices is None else base_prices
+        prices = np.empty(np.shape(states)[:-1] + base.shape[-1:])
+        return np.multiply(base, 1.1, out=prices)
+
+    def adaptive_pricing_batch(self, states, base_prices=None):
+        """Adaptive pricing for a batch of states based on the last demand"""
+        base = self.env.base_prices if base_prices is None else base_prices
+        _, _, demand_bucket, has_history = self._state_features(np.asarray(states))
+        return base * ADAPTIVE_DEMAND_FACTORS[has_history, demand_bucket]
+
+    def time_based_pricing_batch(self, states, base_prices=None):
+        """Time-of-day pricing for a batch of states"""
+        base = self.env.base_prices if base_prices is None else base_prices
+        return base * HOUR_FACTORS[self._state_time(np.asarray(states)) % 24]
+
+    def combined_pricing_batch(self, states, base_prices=None):
+        """Combined time, demand and competitor pricing for a batch of states"""
+        base = self.env.base_prices if base_prices is None else base_prices
+        current_time, competitor_ratios, demand_bucket, has_history = self._state_features(np.asarray(states))
+
+        # Start with time-based factor, then adjust based on recent demand if available
+        prices = base * HOUR_FACTORS[current_time % 24] * COMBINED_DEMAND_FACTORS[has_history, demand_bucket]
+
+        # Pull prices back towards the average competitor price when far off
+        if self.env.competitors:
+            avg_competitor_price = np.add.reduce(competitor_ratios, axis=-2) / self.env.competitors * base
+            prices = np.where(prices > avg_competitor_price * 1.1, avg_competitor_price * 1.05, prices)
+            prices = np.where(prices < avg_competitor_price * 0.9, avg_competitor_price * 0.95, prices)
+        return prices
+
+    def price_batch(self, states, base_prices=None):
+        """(..., products) prices from the chosen strategy for one state row or a batch of states"""
+        strategy = {
+            'fixed': self.fixed_pricing_batch,
+            'adaptive': self.adaptive_pricing_batch,
+            'time': self.time_based_pricing_batch,
+        }.get(self.strategy, self.combined_pricing_batch)  # combined or default
+        return strategy(states, base_prices)
+
+    def select_actions(self, states, base_prices=None):
+        """Pricing actions for a batch of states, e.g. from a vector environment.
+
+        Returns (N, products) price-level indices, which MarketEnvironment
+        and VectorMarketEnvironment accept as factored actions, and the
+        (N, products) prices they were encoded from.
+        """
+        base = self.env.base_prices if base_prices is None else base_prices
+        prices = self.price_batch(states, base)
+        return _nearest_price_levels(prices, base), prices
+
     def fixed_pricing_strategy(self, state):
         """Simple fixed pricing strategy - prices at 10% markup from base price"""
-        prices = []
-        for product in self.products:
-            prices.append(product['base_price'] * 1.1)
-        return prices
+        return self.fixed_pricing_batch(state[0])
     
     def adaptive_pricing_strategy(self, state):
         """Adaptive pricing based on recent demand"""
-        prices = []
-        for product in self.products:
-            product_id = product['id']
-            
-            # If we have demand history, adjust price based on recent demand
-            if len(self.demand_history[product_id]) > 0:
-                recent_demand = self.demand_history[product_id][-1]
-                
-                # If demand is high, increase price
-                if recent_demand > 30:
-                    price = product['base_price'] * 1.15
-                # If demand is medium, slight increase
-                elif recent_demand > 15:
-                    price = product['base_price'] * 1.05
-                # If demand is low, decrease price
-                else:
-                    price = product['base_price'] * 0.95
-            else:
-                # Start with a small markup
-                price = product['base_price'] * 1.05
-                
-            prices.append(price)
-        return prices
+        return self.adaptive_pricing_batch(state[0])
     
     def time_based_pricing_strategy(self, state):
         """Time-based pricing strategy"""
-        prices = []
-        
-        # Extract current time from state
-        current_time = int(state[0][self.env.num_products * (1 + self.env.competitors)] * self.env.time_periods)
-        
-        # Time of day pricing factors
-        time_of_day = current_time % 24
-        
-        # Morning hours (6-10 AM): Lower prices
-        if time_of_day < 4:
-            price_factor = 0.95
-        # Midday hours (10 AM - 2 PM): Standard prices
-        elif time_of_day < 8:
-            price_factor = 1.0
-        # Afternoon hours (2-6 PM): Slightly higher prices
-        elif time_of_day < 12:
-            price_factor = 1.05
-        # Evening hours (6-10 PM): Peak prices
-        elif time_of_day < 16:
-            price_factor = 1.15
-        # Night hours (10 PM - 6 AM): Discount prices
-        else:
-            price_factor = 0.9
-            
-        for product in self.products:
-            prices.append(product['base_price'] * price_factor)
-            
-        return prices
+        return self.time_based_pricing_batch(state[0])
     
     def combined_strategy(self, state):
         """Combined strategy using time, demand, and competitor information"""
-        prices = []
-        
-        # Extract current time from state
-        current_time = int(state[0][self.env.num_products * (1 + self.env.competitors)] * self.env.time_periods)
-        
-        # Time of day pricing factors
-        time_of_day = current_time % 24
-        
-        # Morning hours (6-10 AM): Lower prices
-        if time_of_day < 4:
-            time_factor = 0.95
-        # Midday hours (10 AM - 2 PM): Standard prices
-        elif time_of_day < 8:
-            time_factor = 1.0
-        # Afternoon hours (2-6 PM): Slightly higher prices
-        elif time_of_day < 12:
-            time_factor = 1.05
-        # Evening hours (6-10 PM): Peak prices
-        elif time_of_day < 16:
-            time_factor = 1.15
-        # Night hours (10 PM - 6 AM): Discount prices
-        else:
-            time_factor = 0.9
-            
-        # Extract competitor prices from state
-        competitor_prices = {}
-        for i in range(self.env.num_products):
-            competitor_prices[i] = []
-            for c in range(self.env.competitors):
-                idx = self.env.num_products + c * self.env.num_products + i
-                competitor_prices[i].append(state[0][idx] * self.products[i]['base_price'])
-        
-        for i, product in enumerate(self.products):
-            product_id = product['id']
-            base_price = product['base_price']
-            
-            # Start with time-based factor
-            price = base_price * time_factor
-            
-            # Adjust based on recent demand if available
-            if len(self.demand_history[product_id]) > 0:
-                recent_demand = self.demand_history[product_id][-1]
-                
-                # If demand is high, increase price
-                if recent_demand > 30:
-                    price *= 1.1
-                # If demand is medium, slight increase
-                elif recent_demand > 15:
-                    price *= 1.02
-                # If demand is low, decrease price
-                else:
-                    price *= 0.95
-            
-            # Adjust based on competitor prices
-            if i in competitor_prices and competitor_prices[i]:
-                avg_competitor_price = sum(competitor_prices[i]) / len(competitor_prices[i])
-                
-                # If our price is much higher than competitors, reduce it
-                if price > avg_competitor_price * 1.1:
-                    price = avg_competitor_price * 1.05
-                # If our price is much lower than competitors, increase it slightly
-                elif price < avg_competitor_price * 0.9:
-                    price = avg_competitor_price * 0.95
-            
-            prices.append(price)
-            
-        return prices
+        return self.combined_pricing_batch(state[0])
     
     def select_action(self, state):
-        """Select pricing action based on the chosen strategy"""
-        if self.strategy == 'fixed':
-            prices = self.fixed_pricing_strategy(state)
-        elif self.strategy == 'adaptive':
-            prices = self.adaptive_pricing_strategy(state)
-        elif self.strategy == 'time':
-            prices = self.time_based_pricing_strategy(state)
-        else:  # combined or default
-            prices = self.combined_strategy(state)
+        """Select pricing action based on the chosen strategy.
+
+        The action is a joint index, which only exists for up to
+        MAX_JOINT_PRODUCTS products; select_actions() scales to any catalog.
+        """
+        prices = self.price_batch(state[0])
             
         # Convert prices to action index
         action = self.env._price_to_action(prices)
         
         return action, prices
     
-    def run_episode(self):
-        """Run a full episode with the baseline strategy"""
-        state = self.env.reset()
+    def run_episode(self, writer=None, episode=0, seed=None):
+        """Run a full episode with the baseline strategy.
+
+        seed reseeds the environment for a reproducible episode. Every step
+        is also logged to writer (a TrajectoryWriter) if given.
+        """
+        env = self.env
+        state = env.reset(seed=seed)
         self.reset()
         
         done = False
         total_reward = 0
+        step = 0
         
         while not done:
-            action, prices = self.select_action(state)
-            
-            # Update price history
-            for i, product in enumerate(self.products):
-                if i < len(prices):
-                    self.price_history[product['id']].append(prices[i])
+            # Step with the per-product price levels rather than their joint
+            # action index, which env would only decode again
+            prices = self.price_batch(state[0])
+            levels = env.prices_to_levels(prices)
             
-            next_state, reward, done, info = self.env.step(action)
+            next_state, reward, done, info = env.step(levels)
             
-            # Update demand history
-            for product_id, demand in info['demand'].items():
-                self.demand_history[product_id].append(demand)
-                
-            # Update revenue and profit history
-            self.revenue_history.append(info['revenue'])
-            self.profit_history.append(info['profit'])
+            # Update price, demand, revenue and profit history
+            self.price_history[step] = prices
+            self.demand_history[step] = info['demand']
+            self.revenue_history[step] = info['revenue']
+            self.profit_history[step] = info['profit']
+
+            if writer is not None:
+                writer.write(
+                    episode, step, state, levels, env.current_prices,
+                    info['demand'], info['revenue'], info['profit'], info['customer_satisfaction'],
+                    next_state, done
+                )
+            step += 1
+            self.steps = step
             
             state = next_state
             total_reward += reward
             
-        return total_reward, self.revenue_history, self.profit_history
+        return total_reward, self.revenue_history[:step], self.profit_history[:step]
+
+    def run_vector_episode(self, vec_env, seed=None, writer=None, episode=0):
+        """Run one episode in every market of a VectorMarketEnvironment in lockstep.
+
+        The strategy prices all markets at once through select_actions().
+        seed reseeds vec_env first; its noise does not depend on the
+        actions, so two strategies run with the same seed see the same
+        markets. Every step is also logged to writer (a TrajectoryWriter)
+        if given. Returns the (N,) total profit of each market.
+        """
+        states = vec_env.reset(seed=seed)
+        total_rewards = np.zeros(vec_env.num_envs)
+        done = False
+        step = 0
+        while not done:
+            levels, _ = self.select_actions(states, vec_env.base_prices)
+            next_states, rewards, dones, infos = vec_env.step(levels)
+            if writer is not None:
+                writer.write(
+                    episode, step, states, levels, vec_env.current_prices,
+                    infos['demand'], infos['revenue'], infos['profit'], infos['customer_satisfaction'],
+                    next_states, dones
+                )
+            step += 1
+            states = next_states
+            total_rewards += rewards
+            done = dones.all()
+        return total_rewards
     
     def get_performance_metrics(self):
         """Get performance metrics for the baseline strategy"""
-        total_revenue = sum(self.revenue_history)
-        total_profit = sum(self.profit_history)
+        steps = self.steps
+        revenue = self.revenue_history[:steps]
+        profit = self.profit_history[:steps]
         
         return {
-            'total_revenue': total_revenue,
-            'total_profit': total_profit,
-            'revenue_history': self.revenue_history,
-            'profit_history': self.profit_history,
-            'price_history': self.price_history,
-            'demand_history': self.demand_history
+            'total_revenue': float(revenue.sum()),
+            'total_profit': float(profit.sum()),
+            'revenue_history': revenue.tolist(),
+            'profit_history': profit.tolist(),
+            'price_history': dict(zip(self.product_ids, self.price_history[:steps].T.tolist())),
+            'demand_history': dict(zip(self.product_ids, self.demand_history[:steps].T.tolist()))
         }
@@ -0,0 +1,220 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, registry, name, help):
+        self.name = name
+        self.help = help
+        self._lock = registry._lock
+        self._values = {}
+
+    def samples(self):
+        """(suffix, labels, value) tuples for the exposition"""
+        with self._lock:
+            return [('', labels, value) for labels, value in sorted(self._values.items())]
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0.0)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, value=1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = float(value)
+
+    def inc(self, value=1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def dec(self, value=1.0, **labels):
+        self.inc(-value, **labels)
+
+
+# Default histogram buckets in seconds, from 0.1 ms to 10 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, plus their sum and count"""
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help, buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, help)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def summary(self, **labels):
+        """Count, sum and estimated p50/p90/p99 for one label set"""
+        with self._lock:
+            entry = self._values.get(tuple(sorted(labels.items())))
+            if entry is None:
+                return {"count": 0, "sum": 0.0, "p50": None, "p90": None, "p99": None}
+            counts, total, count = list(entry[0]), entry[1], entry[2]
+        return {
+            "count": count,
+            "sum": total,
+            "p50": self._quantile(counts, count, 0.5),
+            "p90": self._quantile(counts, count, 0.9),
+            "p99": self._quantile(counts, count, 0.99),
+        }
+
+    def _quantile(self, counts, count, q):
+        """Linear interpolation inside the bucket holding the q-th observation"""
+        rank = q * count
+        seen = 0
+        for i, c in enumerate(counts):
+            if seen + c >= rank and c:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i]
+                if upper == float('inf'):
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / c
+            seen += c
+        return self.buckets[-2]
+
+    def label_sets(self):
+        with self._lock:
+            return [dict(labels) for labels in self._values]
+
+    def samples(self):
+        out = []
+        with self._lock:
+            items = sorted((labels, (list(e[0]), e[1], e[2])) for labels, e in self._values.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                out.append(('_bucket', labels + (('le', _format_value(bound)),), cumulative))
+            out.append(('_sum', labels, total))
+            out.append(('_count', labels, count))
+        return out
+
+
+class MetricsRegistry:
+    """Named counters and gauges rendered in the Prometheus text format.
+
+    Metrics are created on first use by name and may carry labels, e.g.
+    registry.counter('x_total', 'help').inc(phase='act').
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get(self, cls, name, help):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, help)
+        return metric
+
+    def counter(self, name, help=''):
+        return self._get(Counter, name, help)
+
+    def gauge(self, name, help=''):
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name, help='', buckets=LATENCY_BUCKETS):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(self, name, help, buckets)
+        return metric
+
+    def render(self):
+        """The Prometheus text exposition of every metric"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            samples = metric.samples()
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+class PhaseTimer:
+    """Wall-clock time and call counts per named phase.
+
+    Time accumulates locally while an episode runs; flush() adds it to the
+    registry's training_phase_seconds_total / training_phase_calls_total
+    counters and starts a new record, so timing costs no locking per call.
+    """
+
+    def __init__(self, registry=None):
+        self.registry = registry
+        self.reset()
+
+    def reset(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+            self.calls[name] += 1
+
+    def snapshot(self):
+        return {
+            name: {"seconds": self.seconds[name], "calls": self.calls[name]}
+            for name in self.seconds
+        }
+
+    def flush(self):
+        """Publish and return the current record, then start a new one"""
+        record = self.snapshot()
+        if self.registry is not None:
+            seconds = self.registry.counter('training_phase_seconds_total', 'Wall-clock seconds spent per training phase')
+            calls = self.registry.counter('training_phase_calls_total', 'Calls per training phase')
+            for name, entry in record.items():
+                seconds.inc(entry["seconds"], phase=name)
+                calls.inc(entry["calls"], phase=name)
+        self.reset()
+        return record
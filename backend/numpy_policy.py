@@ -0,0 +1,60 @@
+import numpy as np
+
+
+def _relu(x):
+    return np.maximum(x, 0.0)
+
+
+class NumpyPolicy:
+    """Greedy pricing policy evaluated with plain NumPy.
+
+    Reproduces the forward pass of DQNAgent's dueling network (the Dense
+    stack plus the value/advantage combination, optionally branched per
+    product) from weights exported with DQNAgent.export_policy, so a serving
+    process can pick prices without importing TensorFlow.
+    """
+
+    def __init__(self, weights, action_size, action_branches=0):
+        self.action_size = int(action_size)
+        self.action_branches = int(action_branches)
+        self.dueling = 'advantage/kernel' in weights
+        self._layers = {}
+        for key, arr in weights.items():
+            layer, _, part = key.partition('/')
+            self._layers.setdefault(layer, {})[part] = np.asarray(arr, dtype=np.float32)
+        self.state_size = self._layers['hidden_1']['kernel'].shape[0]
+
+    @classmethod
+    def load(cls, path):
+        """Load a policy written by DQNAgent.export_policy"""
+        with np.load(path) as data:
+            weights = {k: data[k] for k in data.files if '/' in k}
+            return cls(weights, data['action_size'], data['action_branches'])
+
+    def _dense(self, name, x):
+        layer = self._layers[name]
+        return x @ layer['kernel'] + layer['bias']
+
+    def q_values(self, states):
+        """Q-values for (N, state_size) states: (N, actions) or (N, branches, levels)"""
+        x = np.asarray(states, dtype=np.float32).reshape(-1, self.state_size)
+        x = _relu(self._dense('hidden_1', x))
+        x = _relu(self._dense('hidden_2', x))
+
+        if not self.dueling:
+            return self._dense('q_values', x)
+
+        value = self._dense('value', _relu(self._dense('value_fc', x)))
+        advantage = self._dense('advantage', _relu(self._dense('advantage_fc', x)))
+        if self.action_branches:
+            advantage = advantage.reshape(-1, self.action_branches, self.action_size)
+            value = value[:, :, None]
+        return value + advantage - advantage.mean(axis=-1, keepdims=True)
+
+    def act_batch(self, states):
+        """Greedy actions for a batch of states"""
+        return np.argmax(self.q_values(states), axis=-1)
+
+    def act(self, state):
+        """Greedy action for a single state"""
+        return self.act_batch(state)[0]
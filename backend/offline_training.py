@@ -0,0 +1,88 @@
+import os
+import zlib
+
+import numpy as np
+import tensorflow as tf
+
+from trajectory_log import TrajectoryReader
+
+
+def _chunk_paths(paths):
+    """Chunk directories of every trajectory log under paths"""
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    chunks = []
+    for path in paths:
+        chunks.extend(TrajectoryReader(path).chunk_paths())
+    return chunks
+
+
+def transition_dataset(paths, batch_size=64, action_branches=None, num_price_levels=5,
+                       shuffle_buffer=50000, seed=None, epochs=1, gradient_steps=1):
+    """Stream logged transitions as DQN minibatches.
+
+    paths are one or more TrajectoryWriter directories (agent or baseline
+    logs). Chunks are visited in shuffled order and decoded in parallel;
+    each chunk's rows are permuted and cut into minibatches (its last
+    partial batch is dropped), minibatches from several chunks are
+    interleaved and then shuffled through a buffer of about shuffle_buffer
+    rows. Working in minibatches rather than single rows keeps tf.data's
+    per-element overhead off the training path.
+
+    Each element is (states, actions, rewards, next_states, dones) shaped
+    (gradient_steps, batch_size, ...), ready for one call of DQNAgent's
+    compiled train step. Actions are per-product price levels for a
+    branching agent (action_branches set) and joint action indices
+    otherwise.
+    """
+    chunks = _chunk_paths(paths)
+    if not chunks:
+        raise ValueError(f"No trajectory chunks found in {paths}")
+    state_size = TrajectoryReader(os.path.dirname(chunks[0])).state_size
+    action_dtype = tf.int32 if action_branches else tf.int64
+
+    def load_chunk(chunk_path):
+        chunk_path = chunk_path.decode()
+        cols = {
+            name: np.load(os.path.join(chunk_path, f"{name}.npy"))
+            for name in ('state', 'action', 'profit', 'next_state', 'done')
+        }
+        n = len(cols['done']) // batch_size * batch_size
+        rng = np.random.default_rng(None if seed is None else [seed, zlib.crc32(chunk_path.encode())])
+        rows = rng.permutation(len(cols['done']))[:n]
+
+        levels = cols['action'][rows].astype(np.int64)
+        if action_branches:
+            actions = levels.astype(np.int32)
+        else:
+            actions = levels @ (num_price_levels ** np.arange(levels.shape[1]))
+        batches = n // batch_size
+        return (
+            cols['state'][rows].astype(np.float32).reshape(batches, batch_size, state_size),
+            actions.reshape((batches, batch_size) + actions.shape[1:]),
+            cols['profit'][rows].astype(np.float32).reshape(batches, batch_size),
+            cols['next_state'][rows].astype(np.float32).reshape(batches, batch_size, state_size),
+            cols['done'][rows].astype(np.float32).reshape(batches, batch_size),
+        )
+
+    def decode(chunk_path):
+        states, actions, rewards, next_states, dones = tf.numpy_function(
+            load_chunk, [chunk_path],
+            [tf.float32, action_dtype, tf.float32, tf.float32, tf.float32]
+        )
+        states.set_shape([None, batch_size, state_size])
+        next_states.set_shape([None, batch_size, state_size])
+        actions.set_shape([None, batch_size, action_branches] if action_branches else [None, batch_size])
+        rewards.set_shape([None, batch_size])
+        dones.set_shape([None, batch_size])
+        return tf.data.Dataset.from_tensor_slices((states, actions, rewards, next_states, dones))
+
+    files = tf.data.Dataset.from_tensor_slices(chunks)
+    files = files.shuffle(len(chunks), seed=seed, reshuffle_each_iteration=True).repeat(epochs)
+    return (
+        files.interleave(decode, cycle_length=min(len(chunks), 8),
+                         num_parallel_calls=tf.data.AUTOTUNE, deterministic=False)
+        .shuffle(max(1, shuffle_buffer // batch_size), seed=seed)
+        .batch(gradient_steps, drop_remainder=True)
+        .prefetch(tf.data.AUTOTUNE)
+    )
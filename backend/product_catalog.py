@@ -0,0 +1,88 @@
+import numpy as np
+
+# Named products used for the first SKUs of a catalog; later SKUs get
+# synthetic "<category> <kind> #<n>" names
+PRODUCT_NAMES = [
+    "Premium Headphones", "Wireless Keyboard", "Smart Watch",
+    "Bluetooth Speaker", "Gaming Mouse", "External SSD",
+    "Wireless Earbuds", "Mechanical Keyboard", "Webcam HD"
+]
+CATEGORIES = np.array(['Audio', 'Computing', 'Wearable', 'Gaming', 'Storage'])
+_KINDS = {
+    'Audio': ['Headphones', 'Speaker', 'Earbuds', 'Soundbar'],
+    'Computing': ['Keyboard', 'Monitor', 'Webcam', 'Dock'],
+    'Wearable': ['Smart Watch', 'Fitness Band', 'Smart Ring'],
+    'Gaming': ['Mouse', 'Controller', 'Headset', 'Mousepad'],
+    'Storage': ['External SSD', 'USB Drive', 'Memory Card', 'NAS Drive'],
+}
+
+
+class ProductCatalog:
+    """Static product attributes held as one contiguous array per field.
+
+    Row i of every array describes product i; ids are the row positions.
+    Names are only materialised when records are requested, so catalogs of
+    tens of thousands of SKUs cost a handful of float arrays.
+    """
+
+    def __init__(self, base_prices, stocks, demand_elasticity, qualities, seasonalities,
+                 category_codes, cost_ratio=0.6):
+        self.base_prices = np.asarray(base_prices, dtype=np.float64)
+        self.costs = self.base_prices * cost_ratio
+        self.stocks = np.asarray(stocks, dtype=np.int64)
+        self.demand_elasticity = np.asarray(demand_elasticity, dtype=np.float64)
+        self.qualities = np.asarray(qualities, dtype=np.float64)
+        self.seasonalities = np.asarray(seasonalities, dtype=np.float64)
+        self.category_codes = np.asarray(category_codes, dtype=np.int8)
+        self.ids = np.arange(len(self.base_prices))
+
+    @classmethod
+    def generate(cls, num_products, rng=None):
+        """Draw a synthetic catalog of any size from rng (an np.random.Generator)"""
+        rng = rng if rng is not None else np.random.default_rng()
+        n = num_products
+        return cls(
+            base_prices=rng.uniform(50, 200, n),
+            stocks=rng.integers(50, 201, n),
+            demand_elasticity=-1.2 - rng.random(n) * 0.8,  # Between -1.2 and -2.0
+            qualities=rng.uniform(0.7, 1.0, n),
+            seasonalities=rng.uniform(0.8, 1.2, n),
+            category_codes=rng.integers(0, len(CATEGORIES), n),
+        )
+
+    def __len__(self):
+        return len(self.base_prices)
+
+    def name(self, i):
+        if i < len(PRODUCT_NAMES):
+            return PRODUCT_NAMES[i]
+        category = CATEGORIES[self.category_codes[i]]
+        kinds = _KINDS[category]
+        return f"{category} {kinds[i % len(kinds)]} #{i}"
+
+    def records(self, current_prices=None, stocks=None, offset=0, limit=None):
+        """Product dicts for rows offset..offset+limit, with live prices/stock if given"""
+        stop = len(self) if limit is None else min(len(self), offset + limit)
+        rows = slice(offset, stop)
+        prices = (self.base_prices if current_prices is None else current_prices)[rows].tolist()
+        stocks = (self.stocks if stocks is None else stocks)[rows].tolist()
+        return [
+            {
+                'id': i,
+                'name': self.name(i),
+                'base_price': bp,
+                'current_price': cp,
+                'cost': cost,
+                'stock': stock,
+                'demand_elasticity': el,
+                'category': str(CATEGORIES[code]),
+                'quality': q,
+                'seasonality': s
+            }
+            for i, bp, cp, cost, stock, el, code, q, s in zip(
+                range(offset, stop), self.base_prices[rows].tolist(), prices,
+                self.costs[rows].tolist(), stocks, self.demand_elasticity[rows].tolist(),
+                self.category_codes[rows].tolist(), self.qualities[rows].tolist(),
+                self.seasonalities[rows].tolist()
+            )
+        ]
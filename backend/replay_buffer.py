@@ -0,0 +1,223 @@
+import numpy as np
+
+
+class ReplayBuffer:
+    """Fixed-capacity ring buffer of transitions held in preallocated arrays.
+
+    States are stored as float32 rows, inserts overwrite the oldest slot in
+    O(1) and sampling draws a vector of indices and gathers each field into
+    reusable batch arrays, so no per-transition Python objects are kept.
+    Sampling draws from rng (an np.random.Generator), e.g. the agent's.
+    """
+
+    def __init__(self, capacity, state_size, action_shape=(), action_dtype=np.int64, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.capacity = int(capacity)
+        self.state_size = state_size
+        self.states = np.zeros((self.capacity, state_size), dtype=np.float32)
+        self.next_states = np.zeros((self.capacity, state_size), dtype=np.float32)
+        self.actions = np.zeros((self.capacity,) + tuple(action_shape), dtype=action_dtype)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.dones = np.zeros(self.capacity, dtype=np.float32)
+        self.position = 0
+        self.size = 0
+        self._batch = None
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        """Drop every stored transition"""
+        self.position = 0
+        self.size = 0
+
+    def add(self, state, action, reward, next_state, done):
+        """Store one transition, overwriting the oldest when full"""
+        i = self.position
+        self.states[i] = np.reshape(state, -1)
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = np.reshape(next_state, -1)
+        self.dones[i] = done
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return i
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Store N transitions at once (e.g. one step of a vector environment)"""
+        n = len(rewards)
+        idx = (self.position + np.arange(n)) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+        self.position = int((self.position + n) % self.capacity)
+        self.size = min(self.size + n, self.capacity)
+        return idx
+
+    def sample_indices(self, batch_size, batches=1):
+        """Uniformly sample batches minibatches of batch_size stored slots (with replacement), concatenated"""
+        return self.rng.integers(0, self.size, size=batch_size * batches)
+
+    def gather(self, idx):
+        """Gather the transitions at idx into the reusable batch arrays.
+
+        The returned arrays are views that are overwritten by the next call.
+        """
+        n = len(idx)
+        if self._batch is None or len(self._batch[2]) < n:
+            self._batch = tuple(
+                np.empty((n,) + arr.shape[1:], dtype=arr.dtype)
+                for arr in (self.states, self.actions, self.rewards, self.next_states, self.dones)
+            )
+        return tuple(
+            np.take(arr, idx, axis=0, out=out[:n])
+            for arr, out in zip((self.states, self.actions, self.rewards, self.next_states, self.dones), self._batch)
+        )
+
+    def sample(self, batch_size):
+        """Sample a batch: (states, actions, rewards, next_states, dones)"""
+        return self.gather(self.sample_indices(batch_size))
+
+    def snapshot(self):
+        """Copies of the stored rows ('arrays') and the ring position ('meta'), for checkpoints"""
+        n = self.size
+        return {
+            "arrays": {
+                "states": self.states[:n].copy(),
+                "actions": self.actions[:n].copy(),
+                "rewards": self.rewards[:n].copy(),
+                "next_states": self.next_states[:n].copy(),
+                "dones": self.dones[:n].copy(),
+            },
+            "meta": {"position": self.position, "size": n}
+        }
+
+    def restore(self, snapshot):
+        """Load a snapshot() into this buffer; its arrays may be memory-mapped"""
+        arrays, n = snapshot["arrays"], snapshot["meta"]["size"]
+        for name in ("states", "actions", "rewards", "next_states", "dones"):
+            getattr(self, name)[:n] = arrays[name]
+        self.position = snapshot["meta"]["position"]
+        self.size = n
+
+
+class SumTree:
+    """Array-backed binary tree where every node holds the sum of its children.
+
+    Leaves store per-slot priorities; updates and proportional lookups walk
+    one level per iteration for a whole batch of indices at once, so both
+    are O(log n) vectorized operations.
+    """
+
+    def __init__(self, capacity):
+        self.leaf_count = 1
+        while self.leaf_count < capacity:
+            self.leaf_count *= 2
+        self.tree = np.zeros(2 * self.leaf_count)
+
+    def total(self):
+        return self.tree[1]
+
+    def get(self, idx):
+        """Priorities stored at the given leaf indices"""
+        return self.tree[np.asarray(idx) + self.leaf_count]
+
+    def update(self, idx, priorities):
+        """Set leaf priorities and refresh the affected ancestors"""
+        nodes = np.asarray(idx, dtype=np.int64).reshape(-1) + self.leaf_count
+        if not len(nodes):
+            return
+        self.tree[nodes] = priorities
+        while nodes[0] > 1:
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values):
+        """Leaf indices whose cumulative-priority interval contains each value"""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while len(nodes) and nodes[0] < self.leaf_count:
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values > left_sum
+            values = np.where(go_right, values - left_sum, values)
+            nodes = np.where(go_right, left + 1, left)
+        return nodes - self.leaf_count
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """Proportional prioritized replay (Schaul et al.) on top of a SumTree.
+
+    New transitions get the highest priority seen so far. Sampling is
+    stratified over the total priority mass and importance-sampling weights
+    are annealed from beta towards 1.
+    """
+
+    def __init__(self, capacity, state_size, action_shape=(), action_dtype=np.int64,
+                 alpha=0.6, beta=0.4, beta_increment=0.001, epsilon=1e-6, rng=None):
+        super().__init__(capacity, state_size, action_shape, action_dtype, rng)
+        self.alpha = alpha
+        self.beta = beta
+        self.initial_beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.tree = SumTree(self.capacity)
+
+    def clear(self):
+        super().clear()
+        self.beta = self.initial_beta
+        self.max_priority = 1.0
+        self.tree = SumTree(self.capacity)
+
+    def add(self, state, action, reward, next_state, done):
+        i = super().add(state, action, reward, next_state, done)
+        self.tree.update([i], self.max_priority ** self.alpha)
+        return i
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        idx = super().add_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(idx, self.max_priority ** self.alpha)
+        return idx
+
+    def sample_indices(self, batch_size, batches=1):
+        """Sample batches minibatches of slots with probability proportional to their priority.
+
+        Each minibatch is stratified over the whole priority mass on its
+        own; the minibatches are returned concatenated.
+        """
+        segment = self.tree.total() / batch_size
+        values = (np.arange(batch_size) + self.rng.random((batches, batch_size))) * segment
+        return np.minimum(self.tree.find(values.ravel()), self.size - 1)
+
+    def importance_weights(self, idx, batch_size=None):
+        """Importance-sampling weights for idx, normalized to a max of 1 within each minibatch of batch_size"""
+        probs = self.tree.get(idx) / self.tree.total()
+        weights = (self.size * probs) ** (-self.beta)
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        weights = weights.reshape(-1, batch_size or len(weights))
+        return (weights / weights.max(axis=1, keepdims=True)).ravel().astype(np.float32)
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot["arrays"]["priorities"] = self.tree.get(np.arange(self.size))
+        snapshot["meta"].update(beta=self.beta, max_priority=self.max_priority)
+        return snapshot
+
+    def restore(self, snapshot):
+        super().restore(snapshot)
+        self.beta = snapshot["meta"]["beta"]
+        self.max_priority = snapshot["meta"]["max_priority"]
+        self.tree = SumTree(self.capacity)
+        if self.size:
+            self.tree.update(np.arange(self.size), np.asarray(snapshot["arrays"]["priorities"]))
+
+    def update_priorities(self, idx, td_errors):
+        """Reset priorities of sampled slots from their latest TD errors"""
+        if not len(idx):
+            return
+        priorities = np.abs(td_errors) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(idx, priorities ** self.alpha)
@@ -0,0 +1,41 @@
+import gzip
+import json
+import threading
+
+
+class ResponseCache:
+    """Pre-encoded response bodies keyed by name and a generation counter.
+
+    Callers bump the generation with invalidate() whenever the data behind
+    the cached responses is replaced. A hit is a dict lookup returning the
+    encoded JSON bytes and, for bodies of at least gzip_min_size bytes, a
+    pre-gzipped copy.
+    """
+
+    def __init__(self, dumps=json.dumps, gzip_min_size=1024):
+        self.dumps = dumps
+        self.gzip_min_size = gzip_min_size
+        self.generation = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Start a new generation and drop every cached body"""
+        with self._lock:
+            self.generation += 1
+            self._entries = {}
+
+    def get(self, key, build):
+        """Return (body, gzipped_body_or_None) for key, building it on a miss"""
+        generation = self.generation
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == generation:
+            return entry[1]
+
+        body = self.dumps(build()).encode('utf-8')
+        gzipped = gzip.compress(body) if len(body) >= self.gzip_min_size else None
+        with self._lock:
+            # Don't store a body built from data that was replaced meanwhile
+            if self.generation == generation:
+                self._entries[key] = (generation, (body, gzipped))
+        return body, gzipped
@@ -22,19 +22,26 @@ logging.basicConfig(
 log = logging.getLogger("test_backend")
 
 # ─── Helpers ──────────────────────────────────────────────────────────────────
-def fetch(path: str, method: str = "get", json_body: Dict[str, Any] = None) -> Any:
+def request_raw(path: str, method: str = "get", json_body: Dict[str, Any] = None, expect: int = 200,
+                **kwargs) -> requests.Response:
     url = f"{BASE_URL}{path}"
     log.debug(f"{method.upper():<5} {url}")
+    kwargs.setdefault("timeout", 10)
     try:
-        resp = getattr(requests, method)(url, json=json_body, timeout=10)
+        resp = getattr(requests, method)(url, json=json_body, **kwargs)
     except requests.RequestException as e:
         log.error(f"Network error calling {path}: {e}")
         sys.exit(1)
-    if resp.status_code != 200:
-        log.error(f"❌ {method.upper()} {path} → HTTP {resp.status_code}")
+    if resp.status_code != expect:
+        log.error(f"❌ {method.upper()} {path} → HTTP {resp.status_code}, expected {expect}")
         log.error("Response body: %s", resp.text)
         sys.exit(1)
-    log.info(f"✅ {method.upper()} {path} → HTTP 200")
+    log.info(f"✅ {method.upper()} {path} → HTTP {resp.status_code}")
+    return resp
+
+
+def fetch(path: str, method: str = "get", json_body: Dict[str, Any] = None, expect: int = 200) -> Any:
+    resp = request_raw(path, method, json_body, expect)
     try:
         return resp.json()
     except ValueError:
@@ -48,6 +55,12 @@ def validate_keys(obj: Dict[str, Any], keys: List[str], context: str):
             log.error(f"Missing key '{k}' in {context} response")
             sys.exit(1)
 
+
+def check(condition: bool, message: str):
+    if not condition:
+        log.error(f"❌ {message}")
+        sys.exit(1)
+
 # ─── Plot Helpers ─────────────────────────────────────────────────────────────
 def plot_and_save(fig, filename: str):
     fig.tight_layout()
@@ -112,6 +125,79 @@ def test_baseline_comparison():
     validate_keys(bc, ["agent_rewards","baseline_rewards","cumulative_agent_rewards","cumulative_baseline_rewards","improvement_percentage"], "GET /baseline_comparison")
     return bc
 
+
+def test_training_stream():
+    """Replay the finished run's episodes over SSE; untilDone closes the stream after done"""
+    resp = request_raw("/training_stream?untilDone=1", stream=True, timeout=30)
+    events, ids = [], []
+    for line in resp.iter_lines(decode_unicode=True):
+        if line.startswith("id: "):
+            ids.append(int(line[4:]))
+        elif line.startswith("event: "):
+            events.append(line[7:])
+        elif line.startswith("data: ") and events[-1] == "episode":
+            validate_keys(json.loads(line[6:]), ["episode","totalEpisodes","reward","avgReward","timing"], "SSE episode")
+    check(events and events[-1] == "done", f"SSE stream should end with done, got {events[-3:]}")
+    check(len(ids) > 0, "SSE stream replayed no episodes of the finished run")
+    check(ids == list(range(ids[0], ids[0] + len(ids))), f"SSE ids are not consecutive episodes: {ids}")
+    log.info("Training stream: %d episode events, ids %s", events.count("episode"), ids[:3])
+    return events
+
+
+def test_metrics():
+    text = request_raw("/metrics").text
+    for name in ("training_active", "http_requests_total", "http_request_duration_seconds_bucket"):
+        check(name in text, f"Missing metric {name} in GET /metrics")
+    log.info("Metrics: %d lines", len(text.splitlines()))
+    return text
+
+
+def test_resume_training():
+    """A checkpointed run can only be resumed while it is unfinished"""
+    resp = fetch("/start_training", method="post", json_body={"episodes": 4, "checkpointEvery": 2})
+    check(resp.get("success"), f"Failed to start checkpointed training: {resp}")
+    wait_for_completion()
+    resp = fetch("/resume_training", method="post", json_body={}, expect=400)
+    check("finished" in resp["message"], f"Unexpected resume_training message: {resp}")
+    return resp
+
+# ─── Serving, Jobs and Evaluation Endpoints ──────────────────────────────────
+def test_recommend():
+    rec = fetch("/recommend", method="post", json_body={})
+    validate_keys(rec, ["success","productIds","prices","priceChanges"], "POST /recommend")
+    check(len(rec["prices"]) == 1 and len(rec["prices"][0]) == len(rec["productIds"]), "POST /recommend price shape")
+    fetch("/recommend", method="post", json_body={"state": [0.0]}, expect=400)
+    fetch("/recommend", method="post", json_body={"state": ["a"] * len(rec["productIds"])}, expect=400)
+    return rec
+
+
+def test_jobs():
+    job = fetch("/jobs", method="post", json_body={"episodes": 2, "seed": 0}, expect=202)["job"]
+    validate_keys(job, ["id","state","config","createdAt","status"], "POST /jobs")
+    while job["state"] in ("queued", "running"):
+        time.sleep(POLL_INTERVAL)
+        job = fetch(f"/jobs/{job['id']}")
+    check(job["state"] == "completed", f"Job ended as {job['state']}: {job.get('error')}")
+    check(any(j["id"] == job["id"] for j in fetch("/jobs")), "GET /jobs is missing the job")
+    res = fetch(f"/jobs/{job['id']}/results")
+    validate_keys(res, ["finalReward","avgLast10","improvementOverBaseline","rewardHistory","baselineHistory"], "GET /jobs/<id>/results")
+    check(len(res["rewardHistory"]) == 2, "GET /jobs/<id>/results history length")
+
+    cancelled = fetch("/jobs", method="post", json_body={"episodes": 50}, expect=202)["job"]
+    fetch(f"/jobs/{cancelled['id']}/cancel", method="post")
+    fetch("/jobs/unknown", expect=404)
+    return job
+
+
+def test_evaluate():
+    ev = fetch("/evaluate", method="post", json_body={"seeds": 20, "seed": 0, "processes": 1})
+    validate_keys(ev, ["success","seeds","results"], "POST /evaluate")
+    for strategy, summary in ev["results"].items():
+        validate_keys(summary, ["episodes","mean","std","ciLow","ciHigh","min","max"], f"POST /evaluate ({strategy})")
+        check(summary["ciLow"] <= summary["mean"] <= summary["ciHigh"], f"POST /evaluate interval ({strategy})")
+    fetch("/evaluate", method="post", json_body={"strategies": ["nope"]}, expect=400)
+    return ev
+
 # ─── Training Workflow ────────────────────────────────────────────────────────
 def start_training(episodes: int, strategy: str):
     log.info(f"=== Starting {episodes} eps with '{strategy}' baseline ===")
@@ -175,6 +261,7 @@ def main():
     # 2) Pre-training
     test_training_status()
     test_training_results()
+    test_evaluate()
 
     # 3) Multi-strategy training
     all_results = {}
@@ -193,7 +280,14 @@ def main():
 
         plot_revenue_vs_baseline(results, baseline_comp, strat)
 
-    # 4) Aggregated plots
+    # 4) Serving, streaming, metrics, checkpoints and isolated jobs
+    test_recommend()
+    test_training_stream()
+    test_metrics()
+    test_resume_training()
+    test_jobs()
+
+    # 5) Aggregated plots
     plot_agent_rewards(all_results)
     plot_revenue_vs_baseline({strat: {'rewardHistory': res['rewardHistory'], 'improvementOverBaseline': res['improvementOverBaseline'] } for strat, res in all_results.items()},
                              {strat: {'baseline_rewards': bl['baseline_rewards']} for strat, bl in all_baselines.items()},
@@ -0,0 +1,26 @@
+from baseline_evaluation import evaluate_baselines, summarize
+from enhanced_env import MarketEnvironment
+
+
+def test_summarize():
+    summary = summarize([1.0, 2.0, 3.0])
+    assert summary["episodes"] == 3 and summary["mean"] == 2.0 and summary["std"] == 1.0
+    assert summary["ciLow"] < 2.0 < summary["ciHigh"]
+    assert (summary["min"], summary["max"]) == (1.0, 3.0)
+
+
+def test_evaluation_is_seeded_and_leaves_env_alone():
+    env = MarketEnvironment(seed=0)
+    stocks = env.stocks.copy()
+    first = evaluate_baselines(env, ["fixed", "combined"], num_seeds=30, seed=4, processes=1, chunk_size=8)
+    second = evaluate_baselines(env, ["fixed", "combined"], num_seeds=30, seed=4, processes=1, chunk_size=8)
+    assert first == second
+    assert first["fixed"]["episodes"] == first["combined"]["episodes"] == 30
+    assert (env.stocks == stocks).all()
+
+
+def test_process_pool_matches_in_process_run():
+    env = MarketEnvironment(seed=0)
+    in_process = evaluate_baselines(env, ["time"], num_seeds=12, seed=1, processes=1, chunk_size=5)
+    pooled = evaluate_baselines(env, ["time"], num_seeds=12, seed=1, processes=2, chunk_size=5)
+    assert pooled == in_process
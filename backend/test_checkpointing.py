@@ -0,0 +1,27 @@
+import numpy as np
+
+import checkpointing
+
+
+def _snapshot(episode):
+    return {"arrays": {"agent/model/0": np.full(3, episode, dtype=np.float32)}, "meta": {"episode": episode}}
+
+
+def test_checkpointer_keeps_the_newest_and_loads_them_back(tmp_path):
+    checkpointer = checkpointing.Checkpointer(str(tmp_path), keep=2)
+    for episode in (1, 2, 3):
+        checkpointer.save(_snapshot(episode), block=True)
+    checkpointer.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["ckpt_000002", "ckpt_000003"]
+    latest = checkpointing.latest_checkpoint(str(tmp_path))
+    loaded = checkpointing.load_checkpoint(latest)
+    assert loaded["meta"] == {"episode": 3}
+    np.testing.assert_array_equal(loaded["arrays"]["agent/model/0"], [3, 3, 3])
+
+
+def test_prune_runs_keeps_the_newest_run_directories(tmp_path):
+    for name in ("run_1_a", "run_2_b", "run_3_c", "other"):
+        (tmp_path / name).mkdir()
+    checkpointing.prune_runs(str(tmp_path), 2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["other", "run_2_b", "run_3_c"]
+    assert checkpointing.latest_checkpoint(str(tmp_path / "missing")) is None
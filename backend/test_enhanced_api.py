@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+
+import enhanced_api as api
+from enhanced_env import MarketEnvironment
+from training_events import TrainingEventLog
+
+
+@pytest.fixture
+def client():
+    return api.app.test_client()
+
+
+@pytest.fixture
+def large_market(monkeypatch):
+    """Swap in a 250-product market for the duration of a test"""
+    monkeypatch.setattr(api, "env", MarketEnvironment(num_products=250, seed=0))
+    api.response_cache.invalidate()
+    yield api.env
+    api.response_cache.invalidate()
+
+
+# ─── Catalog paging ───────────────────────────────────────────────────────────
+def test_price_demand_data_is_paged(client, large_market):
+    response = client.get("/api/price_demand_data")
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == "250"
+    assert len(response.get_json()) == 100
+
+    page = client.get("/api/price_demand_data?offset=240&limit=50").get_json()
+    assert [row["product"] for row in page] == [large_market.catalog.name(i) for i in range(240, 250)]
+    base = large_market.base_prices[240]
+    np.testing.assert_allclose(page[0]["pricePoints"][3], base, atol=0.005)
+    assert page[0]["demand"][3] == 100.0
+
+
+def test_generate_sample_data_returns_count_and_first_page(client, monkeypatch):
+    # The endpoint replaces the global env; put the current one back afterwards
+    monkeypatch.setattr(api, "env", api.env)
+    data = client.post("/api/generate_sample_data").get_json()
+    assert data["productCount"] == api.env.num_products
+    assert len(data["products"]) == min(100, api.env.num_products)
+
+
+# ─── Jobs ─────────────────────────────────────────────────────────────────────
+def test_jobs_reject_checkpoint_every(client):
+    response = client.post("/api/jobs", json={"episodes": 1, "checkpointEvery": 5})
+    assert response.status_code == 400
+    assert not any(job.config["episodes"] == 1 for job in api.job_manager.list())
+
+
+# ─── Training stream ──────────────────────────────────────────────────────────
+def test_training_stream_resumes_after_cursor_and_closes_when_done(client, monkeypatch):
+    events = TrainingEventLog()
+    events.start_run()
+    for episode in (1, 2, 3):
+        events.append({"episode": episode})
+    events.finish()
+    monkeypatch.setattr(api, "training_events", events)
+
+    body = client.get("/api/training_stream?untilDone=1", headers={"Last-Event-ID": "1"}).get_data(as_text=True)
+    assert "id: 1\n" not in body
+    assert "id: 2\nevent: episode\n" in body and "id: 3\nevent: episode\n" in body
+    assert body.endswith("event: done\ndata: {}\n\n")
+
+
+# ─── Baseline evaluation ──────────────────────────────────────────────────────
+def test_evaluate(client):
+    response = client.post("/api/evaluate", json={"strategies": ["fixed", "time"], "seeds": 10, "seed": 0,
+                                                  "processes": 1})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["seeds"] == 10 and set(data["results"]) == {"fixed", "time"}
+    assert data["results"]["fixed"]["episodes"] == 10
+    assert client.post("/api/evaluate", json={"strategies": ["nope"]}).status_code == 400
+
+
+# ─── Metrics ──────────────────────────────────────────────────────────────────
+def test_metrics_and_request_stats(client):
+    client.get("/api/customer_segments")
+    text = client.get("/api/metrics").get_data(as_text=True)
+    assert '# TYPE http_request_duration_seconds histogram' in text
+    assert 'http_requests_total{' in text and 'route="/api/customer_segments"' in text
+    routes = client.get("/api/request_stats").get_json()["routes"]
+    assert any(r["route"] == "/api/customer_segments" and r["count"] >= 1 for r in routes)
+
+
+# ─── Recommendations ──────────────────────────────────────────────────────────
+def _write_policy(path, state_size, branches, levels=5, seed=0):
+    """A random branching dueling policy in DQNAgent.export_policy's format"""
+    rng = np.random.default_rng(seed)
+    shapes = {
+        "hidden_1": (state_size, 64), "hidden_2": (64, 64), "value_fc": (64, 32), "value": (32, 1),
+        "advantage_fc": (64, 32), "advantage": (32, branches * levels)
+    }
+    weights = {}
+    for name, shape in shapes.items():
+        weights[f"{name}/kernel"] = rng.normal(size=shape).astype(np.float32)
+        weights[f"{name}/bias"] = np.zeros(shape[1], np.float32)
+    np.savez(path, action_size=levels, action_branches=branches, **weights)
+
+
+@pytest.fixture
+def policy_path(tmp_path, monkeypatch):
+    path = tmp_path / "policy.npz"
+    monkeypatch.setattr(api, "POLICY_PATH", str(path))
+    monkeypatch.setattr(api, "policy", None)
+    monkeypatch.setattr(api, "_policy_mtime", None)
+    return path
+
+
+def test_recommend_is_unavailable_until_a_policy_is_exported(client, policy_path, monkeypatch):
+    monkeypatch.setattr(api, "agent", None)
+    response = client.post("/api/recommend", json={})
+    assert response.status_code == 503
+    # No agent is built on the request path
+    assert api.agent is None
+
+    _write_policy(policy_path, api.state_size, api.env.action_branches)
+    data = client.post("/api/recommend", json={"states": np.zeros((3, api.state_size)).tolist()}).get_json()
+    assert data["success"] and np.shape(data["prices"]) == (3, api.env.num_products)
+
+
+def test_recommend_rejects_malformed_states(client, policy_path):
+    _write_policy(policy_path, api.state_size, api.env.action_branches)
+    assert client.post("/api/recommend", json={"state": ["a"] * api.state_size}).status_code == 400
+    assert client.post("/api/recommend", json={"states": [[0.0, None]]}).status_code == 400
+    assert client.post("/api/recommend", json={"state": [0.0]}).status_code == 400
+
+
+# ─── Malformed cursors ────────────────────────────────────────────────────────
+@pytest.mark.parametrize("path", [
+    "/api/training_results?since=abc", "/api/training_results?limit=1.5", "/api/baseline_comparison?since=x",
+    "/api/training_timings?limit=ten", "/api/training_stream?since=nope", "/api/products?offset=a",
+    "/api/price_demand_data?limit=b"
+])
+def test_malformed_cursor_is_a_bad_request(client, path):
+    response = client.get(path)
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_malformed_last_event_id_is_a_bad_request(client):
+    assert client.get("/api/training_stream", headers={"Last-Event-ID": "x"}).status_code == 400
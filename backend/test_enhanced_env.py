@@ -0,0 +1,149 @@
+import copy
+
+import numpy as np
+import pytest
+
+from enhanced_env import MAX_JOINT_PRODUCTS, PRICE_LEVELS, MarketEnvironment, VectorMarketEnvironment
+
+
+def _reference_step(base, costs, qualities, seasonalities, segments, time_factor, stocks, satisfaction,
+                    levels, noise, competitors):
+    """One step of the original per-product loop, fed the kernel's noise draw.
+
+    Returns the unrounded demand per product, the profit and the new
+    customer satisfaction.
+    """
+    prices = [base[p] * (1 + PRICE_LEVELS[levels[p]]) for p in range(len(base))]
+    demand, revenue, cost = [], 0.0, 0.0
+    for p, price in enumerate(prices):
+        ratio = price / base[p]
+        competitor_prices = [base[p] * (ratio + noise[c, p] * 0.1 - 0.05) for c in range(competitors)]
+        product_demand = 0.0
+        for s, segment in enumerate(segments):
+            own_price_effect = (base[p] / price) ** segment['price_sensitivity']
+            competitor_price_effect = 1.0
+            for competitor_price in competitor_prices:
+                if competitor_price < price:
+                    competitor_price_effect *= 0.5 + 0.5 * competitor_price / price
+            quality_effect = 0.5 + 0.5 * qualities[p] ** segment['quality_preference']
+            loyalty_effect = 1.0 + segment['loyalty'] * satisfaction
+            segment_demand = (100 * segment['size'] * own_price_effect * competitor_price_effect * quality_effect
+                              * time_factor * loyalty_effect * seasonalities[p])
+            product_demand += segment_demand * (0.9 + 0.2 * noise[competitors + s, p])
+        product_demand = min(product_demand, stocks[p])
+        demand.append(product_demand)
+        revenue += int(product_demand) * price
+        cost += int(product_demand) * costs[p]
+
+    price_satisfaction = 0
+    for p, price in enumerate(prices):
+        price_ratio = price / base[p]
+        if price_ratio < 0.9:
+            price_satisfaction += 0.1
+        elif price_ratio > 1.1:
+            price_satisfaction -= 0.1
+    satisfaction = max(0, min(1, 0.8 * satisfaction + 0.2 * (0.5 + price_satisfaction)))
+    return np.array(demand), revenue - cost, satisfaction
+
+
+def _reference_for_market(env, levels, noise, before):
+    """Reference loop result for a step of env taken from the state in before"""
+    stocks, satisfaction, time = before
+    return _reference_step(
+        env.base_prices, env.costs, env.qualities, env.seasonalities, env.customer_segments,
+        env.time_factors[time % len(env.time_factors)], stocks, satisfaction, levels, noise, env.competitors
+    )
+
+
+# ─── MarketEnvironment ────────────────────────────────────────────────────────
+@pytest.mark.parametrize("seed", range(6))
+def test_step_matches_reference_loop(seed):
+    env = MarketEnvironment(num_products=8, seed=seed)
+    env.reset(seed=seed)
+    actions = np.random.default_rng(seed).integers(0, len(PRICE_LEVELS), size=(env.time_periods, env.num_products))
+    for levels in actions:
+        before = (env.stocks.copy(), env.customer_satisfaction, env.current_time)
+        noise = copy.deepcopy(env.rng).random((env.competitors + len(env.customer_segments), env.num_products))
+        _, reward, _, info = env.step(levels)
+        demand, profit, satisfaction = _reference_for_market(env, levels, noise, before)
+        # The kernel precomputes the own-price effect, so demand may round across an integer
+        np.testing.assert_allclose(info['demand'], np.floor(demand), atol=1)
+        if np.array_equal(info['demand'], np.floor(demand)):
+            assert reward == pytest.approx(profit)
+        assert info['customer_satisfaction'] == pytest.approx(satisfaction)
+
+
+def test_ten_percent_levels_move_satisfaction_like_the_float_ratio():
+    env = MarketEnvironment(num_products=20, seed=0)
+    env.reset(seed=0)
+    ratio = (env.base_prices * (1 + PRICE_LEVELS[0])) / env.base_prices
+    expected = 0.8 * 0.5 + 0.2 * (0.5 + 0.1 * np.count_nonzero(ratio < 0.9))
+    _, _, _, info = env.step(np.zeros(env.num_products, dtype=np.int64))
+    assert info['customer_satisfaction'] == pytest.approx(expected)
+
+
+# ─── VectorMarketEnvironment ──────────────────────────────────────────────────
+def test_vector_step_matches_reference_loop():
+    vec_env = VectorMarketEnvironment(num_envs=4, num_products=8, seed=3)
+    vec_env.reset(seed=3)
+    actions = np.random.default_rng(3).integers(
+        0, len(PRICE_LEVELS), size=(vec_env.time_periods, vec_env.num_envs, vec_env.num_products)
+    )
+    shape = (vec_env.num_envs, vec_env.competitors + vec_env.segment_sizes.shape[1], vec_env.num_products)
+    for levels in actions:
+        stocks, satisfaction, time = vec_env.stocks.copy(), vec_env.customer_satisfaction.copy(), vec_env.current_time
+        noise = copy.deepcopy(vec_env.rng).random(shape)
+        _, rewards, _, infos = vec_env.step(levels)
+        for i, env in enumerate(vec_env.envs):
+            demand, profit, expected = _reference_for_market(
+                env, levels[i], noise[i], (stocks[i], satisfaction[i], time)
+            )
+            np.testing.assert_allclose(infos['demand'][i], np.floor(demand), atol=1)
+            if np.array_equal(infos['demand'][i], np.floor(demand)):
+                assert rewards[i] == pytest.approx(profit)
+            assert infos['customer_satisfaction'][i] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_vector_and_scalar_environments_agree(seed):
+    env = MarketEnvironment(num_products=6, seed=seed)
+    vec_env = VectorMarketEnvironment.replicate(env, 1)
+    state = env.reset(seed=seed)
+    states = vec_env.reset(seed=seed)
+    np.testing.assert_array_equal(states[0], state[0])
+    # Every product at -10% or +10% sits on the satisfaction boundary
+    actions = np.random.default_rng(seed).choice([0, 4], size=(env.time_periods, env.num_products))
+    for levels in actions:
+        state, reward, done, info = env.step(levels)
+        states, rewards, dones, infos = vec_env.step(levels[None])
+        np.testing.assert_allclose(states[0], state[0])
+        np.testing.assert_array_equal(infos['demand'][0], info['demand'])
+        assert rewards[0] == pytest.approx(reward)
+        assert infos['customer_satisfaction'][0] == pytest.approx(info['customer_satisfaction'])
+        assert dones[0] == done
+
+
+# ─── Joint actions ────────────────────────────────────────────────────────────
+def test_joint_actions_round_trip_up_to_the_int64_limit():
+    env = MarketEnvironment(num_products=MAX_JOINT_PRODUCTS, seed=0)
+    levels = np.full(MAX_JOINT_PRODUCTS, len(PRICE_LEVELS) - 1)
+    action = env.encode_action(levels)
+    assert action == 5 ** MAX_JOINT_PRODUCTS - 1
+    np.testing.assert_array_equal(env.decode_action(action), levels)
+    np.testing.assert_allclose(env.levels_to_prices([action])[0], env.base_prices * 1.1)
+
+
+def test_joint_actions_raise_beyond_the_int64_limit():
+    env = MarketEnvironment(num_products=MAX_JOINT_PRODUCTS + 3, seed=0)
+    vec_env = VectorMarketEnvironment.replicate(env, 2)
+    with pytest.raises(ValueError):
+        env.encode_action([4] * env.num_products)
+    with pytest.raises(ValueError):
+        env.decode_action(7)
+    with pytest.raises(ValueError):
+        env.levels_to_prices([7])
+    with pytest.raises(ValueError):
+        vec_env.step([7, 7])
+    # Factored actions still work at any size
+    _, _, _, info = env.step(np.full(env.num_products, 4))
+    assert info['demand'].shape == (env.num_products,)
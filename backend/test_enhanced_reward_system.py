@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from enhanced_reward_system import EnhancedRewardSystem, RewardSeries
+
+
+def _filled(rewards, **retention):
+    series = RewardSeries(**retention)
+    for reward in rewards:
+        series.append(reward)
+    return series
+
+
+# ─── RewardSeries ─────────────────────────────────────────────────────────────
+def test_growth_keeps_values_and_running_totals():
+    rewards = np.random.default_rng(0).normal(size=3000)
+    series = _filled(rewards, capacity=4)
+    np.testing.assert_array_equal(series.values(), rewards)
+    np.testing.assert_allclose(series.cumulative(), np.cumsum(rewards))
+    assert series.total == pytest.approx(rewards.sum())
+    assert series.last() == rewards[-1]
+    assert series.mean_last(10) == pytest.approx(rewards[-10:].mean())
+
+
+def test_cursor_slices():
+    rewards = np.arange(20.0)
+    series = _filled(rewards)
+    np.testing.assert_array_equal(series.values(5, 8), [5, 6, 7])
+    np.testing.assert_array_equal(series.cumulative(5, 8), np.cumsum(rewards)[5:8])
+    assert len(series.values(20)) == 0 and len(series.values(25, 30)) == 0
+    np.testing.assert_array_equal(series.values(18, 100), [18, 19])
+
+
+def test_retention_folds_old_episodes_into_buckets():
+    rewards = np.arange(100.0)
+    series = _filled(rewards, keep_recent=20, bucket_size=10)
+    assert series.count == 100
+    assert 20 <= len(series.values()) <= 30
+    assert series.first_episode() == series.offset == 100 - len(series.values())
+    np.testing.assert_array_equal(series.values(), rewards[series.offset:])
+    # Running totals stay absolute after folding
+    np.testing.assert_allclose(series.cumulative(), np.cumsum(rewards)[series.offset:])
+    assert series.total == pytest.approx(rewards.sum())
+    # A cursor into the folded part starts at the first full-resolution episode
+    np.testing.assert_array_equal(series.values(3, series.offset + 2), rewards[series.offset:series.offset + 2])
+    assert series.first_episode(3) == series.offset
+
+    buckets = series.buckets()
+    assert buckets['start_episodes'] == list(range(0, series.offset, 10))
+    assert buckets['episode_counts'] == [10] * len(buckets['start_episodes'])
+    np.testing.assert_allclose(buckets['mean_rewards'], np.arange(4.5, series.offset, 10))
+
+
+def test_retention_merges_buckets_at_max_buckets():
+    rewards = np.arange(200.0)
+    series = _filled(rewards, keep_recent=10, bucket_size=10, max_buckets=4)
+    buckets = series.buckets()
+    assert len(buckets['start_episodes']) <= 4
+    assert sum(buckets['episode_counts']) == series.offset
+    weighted = np.dot(buckets['episode_counts'], buckets['mean_rewards'])
+    assert weighted == pytest.approx(rewards[:series.offset].sum())
+
+
+def test_snapshot_restore_round_trip():
+    rewards = np.random.default_rng(1).normal(size=75)
+    series = _filled(rewards, keep_recent=20, bucket_size=10)
+    restored = RewardSeries(keep_recent=20, bucket_size=10)
+    restored.restore(series.snapshot())
+    restored.append(1.5)
+    series.append(1.5)
+    np.testing.assert_array_equal(restored.values(), series.values())
+    np.testing.assert_array_equal(restored.cumulative(), series.cumulative())
+    assert restored.buckets() == series.buckets()
+    assert (restored.count, restored.total, restored.offset) == (series.count, series.total, series.offset)
+
+
+# ─── EnhancedRewardSystem ─────────────────────────────────────────────────────
+def test_reward_history_cursor_and_improvement():
+    system = EnhancedRewardSystem(keep_recent=20, bucket_size=10)
+    for episode in range(50):
+        system.add_agent_reward(2.0 * episode)
+        system.add_baseline_reward(float(episode))
+    history = system.get_reward_history(since=45, limit=3)
+    assert history['agent_rewards'] == [90.0, 92.0, 94.0]
+    assert history['baseline_rewards'] == [45.0, 46.0, 47.0]
+    assert history['cumulative_agent_rewards'][0] == pytest.approx(2.0 * sum(range(46)))
+    assert history['history_start'] == 45
+    assert history['improvement_percentage'] == pytest.approx(100.0)
+    assert system.get_reward_history(since=0)['history_start'] == system.agent.offset
@@ -0,0 +1,40 @@
+import pytest
+
+from metrics import Histogram, MetricsRegistry, PhaseTimer
+
+
+def test_render_counters_and_gauges_with_labels():
+    registry = MetricsRegistry()
+    registry.counter('steps_total', 'Steps').inc(3, phase='act')
+    registry.counter('steps_total').inc(2, phase='act')
+    registry.gauge('epsilon', 'Exploration rate').set(0.5)
+    text = registry.render()
+    assert '# TYPE steps_total counter\n' in text
+    assert 'steps_total{phase="act"} 5.0\n' in text
+    assert 'epsilon 0.5\n' in text
+
+
+def test_histogram_buckets_and_quantiles():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    for value in (0.05, 0.05, 0.5, 5.0):
+        histogram.observe(value, route='/x')
+    summary = histogram.summary(route='/x')
+    assert summary["count"] == 4 and summary["sum"] == pytest.approx(5.6)
+    assert 0.0 < summary["p50"] <= 0.1
+    text = registry.render()
+    assert 'latency_seconds_bucket{route="/x",le="0.1"} 2.0\n' in text
+    assert 'latency_seconds_bucket{route="/x",le="+Inf"} 4.0\n' in text
+    assert isinstance(histogram, Histogram) and histogram.label_sets() == [{"route": "/x"}]
+
+
+def test_phase_timer_flushes_into_counters():
+    registry = MetricsRegistry()
+    timer = PhaseTimer(registry)
+    for _ in range(3):
+        with timer.phase('act'):
+            pass
+    record = timer.flush()
+    assert record["act"]["calls"] == 3
+    assert registry.counter('training_phase_calls_total').value(phase='act') == 3
+    assert timer.flush() == {}
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from enhanced_agent import DQNAgent
+from numpy_policy import NumpyPolicy
+
+
+@pytest.mark.parametrize("action_size, action_branches", [(5, 4), (25, None)])
+def test_exported_policy_matches_keras(tmp_path, action_size, action_branches):
+    agent = DQNAgent(12, action_size, action_branches=action_branches, seed=0)
+    # Move the weights off their initial values so every layer matters
+    states = np.random.default_rng(1).random((64, 12)).astype(np.float32)
+    actions = np.zeros((64, action_branches), np.int32) if action_branches else np.zeros(64, np.int64)
+    agent.remember_batch(states, actions, np.linspace(-1, 1, 64), states, np.zeros(64))
+    agent.replay(gradient_steps=5)
+
+    path = tmp_path / "policy.npz"
+    agent.export_policy(str(path))
+    policy = NumpyPolicy.load(str(path))
+
+    assert (policy.state_size, policy.action_size, policy.action_branches) == (12, action_size, action_branches or 0)
+    np.testing.assert_allclose(policy.q_values(states), agent.model(states).numpy(), rtol=1e-5, atol=1e-5)
+    np.testing.assert_array_equal(policy.act_batch(states), agent.act_batch(states, training=False))
+    np.testing.assert_array_equal(policy.act(states[:1]), agent.act(states[:1], training=False))
+    assert not (tmp_path / "policy.npz.tmp").exists()
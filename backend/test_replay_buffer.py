@@ -0,0 +1,168 @@
+import numpy as np
+import pytest
+
+from replay_buffer import PrioritizedReplayBuffer, ReplayBuffer, SumTree
+
+STATE_SIZE = 3
+
+
+def _transitions(rewards):
+    """n transitions whose states and rewards identify them"""
+    rewards = np.asarray(rewards, dtype=np.float32)
+    states = np.repeat(rewards[:, None], STATE_SIZE, axis=1)
+    return states, np.zeros(len(rewards), dtype=np.int64), rewards, states + 1, np.zeros(len(rewards))
+
+
+def _assert_sums_consistent(tree):
+    internal = np.arange(1, tree.leaf_count)
+    np.testing.assert_allclose(tree.tree[internal], tree.tree[2 * internal] + tree.tree[2 * internal + 1])
+
+
+# ─── SumTree ──────────────────────────────────────────────────────────────────
+def test_sum_tree_pads_to_power_of_two():
+    tree = SumTree(5)
+    assert tree.leaf_count == 8
+    tree.update(np.arange(5), [1.0, 2.0, 3.0, 4.0, 5.0])
+    assert tree.total() == 15.0
+    _assert_sums_consistent(tree)
+
+
+def test_sum_tree_find_boundaries():
+    tree = SumTree(4)
+    tree.update(np.arange(4), [1.0, 2.0, 3.0, 4.0])
+    # Leaf i owns the interval (sum of leaves before i, sum up to and including i]
+    values = [0.0, 1.0, np.nextafter(1.0, 2.0), 3.0, np.nextafter(3.0, 4.0), 6.0, 9.99, 10.0]
+    np.testing.assert_array_equal(tree.find(values), [0, 0, 1, 1, 2, 2, 3, 3])
+
+
+def test_sum_tree_find_skips_zero_priority_leaves():
+    tree = SumTree(4)
+    tree.update(np.arange(4), [0.0, 2.0, 0.0, 1.0])
+    np.testing.assert_array_equal(tree.find([1e-9, 2.0, 2.5, 3.0]), [1, 1, 3, 3])
+
+
+def test_sum_tree_duplicate_indices_keep_last_priority():
+    tree = SumTree(8)
+    tree.update([2, 2, 5], [1.0, 3.0, 2.0])
+    assert tree.get([2])[0] == 3.0
+    assert tree.total() == 5.0
+    _assert_sums_consistent(tree)
+
+
+def test_sum_tree_empty_batch():
+    tree = SumTree(4)
+    tree.update([0, 1], [1.0, 2.0])
+    tree.update([], [])
+    tree.update(np.array([], dtype=np.int64), np.array([]))
+    assert tree.total() == 3.0
+    assert len(tree.find([])) == 0
+
+
+# ─── ReplayBuffer ─────────────────────────────────────────────────────────────
+def test_ring_overwrites_oldest():
+    buffer = ReplayBuffer(3, STATE_SIZE)
+    for reward in range(5):
+        buffer.add(*(arr[0] for arr in _transitions([reward])))
+    assert len(buffer) == 3
+    assert buffer.position == 2
+    np.testing.assert_array_equal(buffer.rewards, [3, 4, 2])
+    np.testing.assert_array_equal(buffer.states[:, 0], [3, 4, 2])
+
+
+def test_add_batch_wraps_around():
+    buffer = ReplayBuffer(5, STATE_SIZE)
+    buffer.add_batch(*_transitions([0, 1, 2]))
+    idx = buffer.add_batch(*_transitions([10, 11, 12, 13]))
+    np.testing.assert_array_equal(idx, [3, 4, 0, 1])
+    assert buffer.position == 2
+    assert len(buffer) == 5
+    np.testing.assert_array_equal(buffer.rewards, [12, 13, 2, 10, 11])
+    np.testing.assert_array_equal(buffer.next_states[:, 0], [13, 14, 3, 11, 12])
+
+
+def test_sample_only_returns_stored_slots():
+    buffer = ReplayBuffer(10, STATE_SIZE, rng=np.random.default_rng(0))
+    buffer.add_batch(*_transitions([5, 6, 7]))
+    states, actions, rewards, next_states, dones = buffer.sample(256)
+    assert set(rewards.tolist()) <= {5.0, 6.0, 7.0}
+    np.testing.assert_array_equal(states[:, 0], rewards)
+
+
+# ─── PrioritizedReplayBuffer ──────────────────────────────────────────────────
+def test_proportional_sampling():
+    buffer = PrioritizedReplayBuffer(4, STATE_SIZE, rng=np.random.default_rng(0))
+    buffer.add_batch(*_transitions([0, 1, 2, 3]))
+    buffer.tree.update(np.arange(4), [1.0, 2.0, 3.0, 4.0])
+    draws = np.concatenate([buffer.sample_indices(64) for _ in range(500)])
+    frequencies = np.bincount(draws, minlength=4) / len(draws)
+    np.testing.assert_allclose(frequencies, [0.1, 0.2, 0.3, 0.4], atol=0.01)
+
+
+def test_sampling_ignores_unfilled_slots():
+    buffer = PrioritizedReplayBuffer(8, STATE_SIZE, rng=np.random.default_rng(0))
+    buffer.add_batch(*_transitions([0, 1, 2]))
+    assert buffer.sample_indices(1000).max() < 3
+
+
+def test_new_transitions_get_max_priority():
+    buffer = PrioritizedReplayBuffer(4, STATE_SIZE, alpha=1.0, rng=np.random.default_rng(0))
+    buffer.add_batch(*_transitions([0, 1, 2, 3]))
+    buffer.update_priorities(np.array([1]), np.array([5.0]))
+    assert buffer.max_priority == pytest.approx(5.0 + buffer.epsilon)
+    # The ring wraps onto slot 0, which takes the highest priority seen
+    i = buffer.add(*(arr[0] for arr in _transitions([9])))
+    assert i == 0
+    assert buffer.tree.get([0])[0] == pytest.approx(buffer.max_priority)
+
+
+def test_update_priorities_with_duplicate_indices():
+    buffer = PrioritizedReplayBuffer(4, STATE_SIZE, alpha=1.0, rng=np.random.default_rng(0))
+    buffer.add_batch(*_transitions([0, 1, 2, 3]))
+    buffer.update_priorities(np.array([2, 2]), np.array([0.5, 2.0]))
+    assert buffer.tree.get([2])[0] == pytest.approx(2.0 + buffer.epsilon)
+    _assert_sums_consistent(buffer.tree)
+
+
+def test_update_priorities_empty_batch():
+    buffer = PrioritizedReplayBuffer(4, STATE_SIZE, rng=np.random.default_rng(0))
+    buffer.add_batch(*_transitions([0, 1]))
+    total = buffer.tree.total()
+    buffer.update_priorities(np.array([], dtype=np.int64), np.array([]))
+    assert buffer.tree.total() == total
+
+
+def test_importance_weights_normalized_and_beta_annealed():
+    buffer = PrioritizedReplayBuffer(4, STATE_SIZE, beta=0.4, beta_increment=0.1, rng=np.random.default_rng(0))
+    buffer.add_batch(*_transitions([0, 1, 2, 3]))
+    buffer.tree.update(np.arange(4), [1.0, 2.0, 3.0, 4.0])
+    weights = buffer.importance_weights(np.arange(4))
+    assert weights.max() == pytest.approx(1.0)
+    # Rarely sampled transitions are weighted up
+    assert np.all(np.diff(weights) < 0)
+    assert buffer.beta == pytest.approx(0.5)
+
+
+def test_snapshot_restore_keeps_priorities():
+    buffer = PrioritizedReplayBuffer(4, STATE_SIZE, rng=np.random.default_rng(0))
+    buffer.add_batch(*_transitions([0, 1, 2]))
+    buffer.update_priorities(np.array([0, 2]), np.array([3.0, 0.1]))
+    restored = PrioritizedReplayBuffer(4, STATE_SIZE)
+    restored.restore(buffer.snapshot())
+    np.testing.assert_array_equal(restored.tree.tree, buffer.tree.tree)
+    assert (restored.position, len(restored), restored.max_priority) == (buffer.position, len(buffer), buffer.max_priority)
+
+
+def test_each_minibatch_is_stratified_over_the_whole_buffer():
+    buffer = PrioritizedReplayBuffer(4000, STATE_SIZE, rng=np.random.default_rng(0))
+    buffer.add_batch(*_transitions(np.arange(4000)))
+    idx = buffer.sample_indices(64, batches=4).reshape(4, 64)
+    for minibatch in idx:
+        assert minibatch.min() < 100 and minibatch.max() > 3900
+
+
+def test_importance_weights_normalized_per_minibatch():
+    buffer = PrioritizedReplayBuffer(4, STATE_SIZE, beta=1.0, beta_increment=0.0, rng=np.random.default_rng(0))
+    buffer.add_batch(*_transitions([0, 1, 2, 3]))
+    buffer.tree.update(np.arange(4), [1.0, 2.0, 3.0, 4.0])
+    weights = buffer.importance_weights(np.array([3, 3, 0, 1]), batch_size=2)
+    np.testing.assert_allclose(weights, [1.0, 1.0, 1.0, 0.5])
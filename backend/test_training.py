@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+import checkpointing
+import training
+from enhanced_agent import DQNAgent
+from enhanced_env import MarketEnvironment
+from enhanced_reward_system import EnhancedRewardSystem
+from human_baseline import HumanBaseline
+
+
+@pytest.fixture(autouse=True)
+def no_episode_pause(monkeypatch):
+    monkeypatch.setattr(training.time, "sleep", lambda seconds: None)
+
+
+def _run(agent=None, **train_kwargs):
+    """A TrainingRun on a fixed market, trained with train_kwargs if given"""
+    env = MarketEnvironment(seed=0)
+    if agent is None:
+        agent = DQNAgent(env.state_size, env.num_price_levels, action_branches=env.action_branches, batch_size=16)
+    run = training.TrainingRun(env, agent, HumanBaseline(env), EnhancedRewardSystem())
+    if train_kwargs:
+        run.train(**train_kwargs)
+    return run
+
+
+# ─── Seeding ──────────────────────────────────────────────────────────────────
+def test_seeded_runs_are_reproducible_with_unseeded_agents():
+    first = _run(episodes=3, num_envs=2, seed=5)
+    second = _run(episodes=3, num_envs=2, seed=5)
+    np.testing.assert_array_equal(first.results["rewardHistory"], second.results["rewardHistory"])
+    np.testing.assert_array_equal(first.results["baselineHistory"], second.results["baselineHistory"])
+    for a, b in zip(first.agent.model.get_weights(), second.agent.model.get_weights()):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_seeded_run_restarts_a_trained_agent():
+    run = _run(episodes=2, num_envs=2, seed=1)
+    rewards = np.array(run.results["rewardHistory"])
+    again = _run(run.agent, episodes=2, num_envs=2, seed=1)
+    np.testing.assert_array_equal(again.results["rewardHistory"], rewards)
+
+
+def test_reseed_matches_a_fresh_seeded_agent():
+    agent = DQNAgent(10, 5, action_branches=3, batch_size=4, prioritized_replay=True, seed=7)
+    states = np.random.default_rng(0).random((8, 10))
+    agent.remember_batch(states, np.zeros((8, 3), dtype=np.int32), np.ones(8), states, np.zeros(8))
+    agent.replay()
+    agent.reseed(3)
+    fresh = DQNAgent(10, 5, action_branches=3, batch_size=4, prioritized_replay=True, seed=3)
+    for a, b in zip(agent.model.get_weights(), fresh.model.get_weights()):
+        np.testing.assert_array_equal(a, b)
+    for a, b in zip(agent.model.optimizer.variables, fresh.model.optimizer.variables):
+        np.testing.assert_array_equal(a.numpy(), b.numpy())
+    assert len(agent.memory) == 0 and agent.memory.beta == fresh.memory.beta
+    assert agent.rng.integers(1000) == fresh.rng.integers(1000)
+
+
+# ─── Checkpoints ──────────────────────────────────────────────────────────────
+def test_resume_from_checkpoint_is_bit_exact(tmp_path):
+    full = _run(episodes=4, num_envs=2, seed=2, checkpoint_dir=str(tmp_path), checkpoint_every=2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["ckpt_000002", "ckpt_000004"]
+
+    resumed = _run()
+    config = checkpointing.read_meta(str(tmp_path / "ckpt_000002"))["config"]
+    resumed.train(**dict(config, checkpoint_every=0), resume_from=str(tmp_path / "ckpt_000002"))
+    np.testing.assert_array_equal(resumed.results["rewardHistory"], full.results["rewardHistory"])
+    np.testing.assert_array_equal(resumed.results["baselineHistory"], full.results["baselineHistory"])
+    for a, b in zip(resumed.agent.model.get_weights(), full.agent.model.get_weights()):
+        np.testing.assert_array_equal(a, b)
+    assert resumed.agent.epsilon == full.agent.epsilon
+    # Resumed events carry on numbering from the checkpointed episode
+    _, events, finished = resumed.events.wait_for(resumed.events.run_id, 0, timeout=0)
+    assert [event_id for event_id, _ in events] == [3, 4] and finished
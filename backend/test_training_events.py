@@ -0,0 +1,58 @@
+import json
+import threading
+
+from training_events import TrainingEventLog
+
+
+def _log_with(episodes, finished=False):
+    log = TrainingEventLog()
+    log.start_run()
+    for episode in range(1, episodes + 1):
+        log.append({"episode": episode})
+    if finished:
+        log.finish()
+    return log
+
+
+# ─── Cursors ──────────────────────────────────────────────────────────────────
+def test_events_after_cursor():
+    log = _log_with(5)
+    run_id, events, finished = log.wait_for(log.run_id, 2, timeout=0)
+    assert run_id == log.run_id and not finished
+    assert [event_id for event_id, _ in events] == [3, 4, 5]
+    assert [json.loads(payload)["episode"] for _, payload in events] == [3, 4, 5]
+
+
+def test_caught_up_reader_times_out_empty():
+    log = _log_with(3)
+    assert log.wait_for(log.run_id, 3, timeout=0.01) == (log.run_id, [], False)
+
+
+def test_new_run_restarts_the_cursor():
+    log = _log_with(5)
+    old_run = log.run_id
+    log.start_run()
+    log.append({"episode": 1})
+    run_id, events, _ = log.wait_for(old_run, 5, timeout=0)
+    assert run_id == old_run + 1
+    assert [event_id for event_id, _ in events] == [1]
+
+
+def test_blocked_reader_wakes_on_append():
+    log = _log_with(1)
+    threading.Timer(0.05, log.append, args=({"episode": 2},)).start()
+    _, events, _ = log.wait_for(log.run_id, 1, timeout=5)
+    assert [event_id for event_id, _ in events] == [2]
+
+
+# ─── Finishing ────────────────────────────────────────────────────────────────
+def test_idle_log_is_not_finished():
+    log = TrainingEventLog()
+    assert log.wait_for(log.run_id, 0, timeout=0.01) == (log.run_id, [], False)
+
+
+def test_finish_wakes_a_reader_once():
+    log = _log_with(2, finished=True)
+    assert log.wait_for(log.run_id, 2, timeout=5) == (log.run_id, [], True)
+    # Having seen the finish, the reader waits for the next run instead
+    assert log.wait_for(log.run_id, 2, timeout=0.01, seen_finish=True) == (log.run_id, [], True)
@@ -0,0 +1,45 @@
+import threading
+
+from training_jobs import TrainingJobManager
+
+
+class _Run:
+    """Stands in for a TrainingRun: trains instantly or fails on request"""
+
+    def __init__(self, config):
+        self.status = {"isTraining": False, "currentEpisode": 0}
+        self.cancel_event = threading.Event()
+
+    def train(self, episodes, fail=False):
+        if fail:
+            raise RuntimeError("boom")
+        self.status["currentEpisode"] = episodes
+
+    def results_payload(self):
+        return {"rewardHistory": [1.0] * self.status["currentEpisode"]}
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
+def _finish(manager, configs):
+    jobs = [manager.submit(config) for config in configs]
+    manager._executor.shutdown(wait=True)
+    return jobs
+
+
+# ─── Finished jobs ────────────────────────────────────────────────────────────
+def test_finished_jobs_keep_results_but_drop_the_run():
+    manager = TrainingJobManager(_Run, max_workers=1)
+    job, failed = _finish(manager, [{"episodes": 3}, {"episodes": 1, "fail": True}])
+    assert job.state == "completed" and job.run is None
+    assert job.results_payload() == {"rewardHistory": [1.0, 1.0, 1.0]}
+    assert job.to_dict()["status"]["currentEpisode"] == 3
+    assert failed.state == "failed" and failed.error == "boom" and failed.run is None
+
+
+def test_only_the_newest_finished_jobs_are_kept():
+    manager = TrainingJobManager(_Run, max_workers=1, max_finished=2)
+    jobs = _finish(manager, [{"episodes": i} for i in range(1, 5)])
+    assert [job.id for job in manager.list()] == [jobs[2].id, jobs[3].id]
+    assert manager.get(jobs[0].id) is None
@@ -0,0 +1,375 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+import checkpointing
+from actor_learner import ActorLearner
+from enhanced_env import VectorMarketEnvironment
+from metrics import MetricsRegistry, PhaseTimer
+from training_events import TrainingEventLog
+from trajectory_log import TrajectoryWriter
+
+
+class TrainingRun:
+    """One DQN training run and the objects it owns.
+
+    The environment, agent, baseline and reward system are only touched by
+    this run while it trains, so separate runs can train side by side.
+    status and results are the dicts the API serves for the run; pass
+    existing dicts to have them updated in place. Per-phase timings are
+    published to metrics (a MetricsRegistry) and kept per episode in
+    timings.
+    """
+
+    def __init__(self, env, agent, baseline, reward_system, status=None, results=None, events=None,
+                 metrics=None):
+        self.env = env
+        self.agent = agent
+        self.baseline = baseline
+        self.reward_system = reward_system
+        self.status = status if status is not None else {}
+        self.results = results if results is not None else {}
+        self.events = events if events is not None else TrainingEventLog()
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.timings = []
+        # Bumped whenever results changes
+        self.results_version = 0
+        self.cancel_event = threading.Event()
+
+        self.status.update({
+            "isTraining": False,
+            "currentEpisode": 0,
+            "totalEpisodes": 0,
+            "startTime": None,
+            "endTime": None
+        })
+        self.results.update({
+            "finalReward": 0,
+            "avgLast10": 0,
+            "improvementOverBaseline": 0,
+            "rewardHistory": [],
+            "baselineHistory": []
+        })
+
+    def results_payload(self, since=0, limit=None):
+        """JSON-ready results, with the reward histories cut to episodes [since, since + limit).
+
+        Sliced payloads also carry since and episodeCount; with a reward
+        retention policy, historyStart gives the first full-resolution
+        episode returned.
+        """
+        reward_system = self.reward_system
+        end = None if limit is None else since + limit
+        payload = dict(
+            self.results,
+            rewardHistory=reward_system.agent.values(since, end).tolist(),
+            baselineHistory=reward_system.baseline.values(since, end).tolist()
+        )
+        if since or limit is not None:
+            payload.update(since=since, episodeCount=reward_system.agent.count)
+        if reward_system.agent.keep_recent is not None:
+            payload["historyStart"] = reward_system.agent.first_episode(since)
+        return payload
+
+    def cancel(self):
+        """Ask the run to stop after the current episode"""
+        self.cancel_event.set()
+
+    def resume(self, checkpoint_dir, checkpoint_every=None, save_path=None, policy_path=None):
+        """Continue the run checkpointed in checkpoint_dir from its latest checkpoint.
+
+        The episode count, baseline, environment, seed and (unless
+        checkpoint_every is given) checkpoint settings come from the
+        checkpoint; trajectories are not logged for the resumed part.
+        Returns the checkpoint's meta, or None if there is no checkpoint.
+        """
+        path = checkpointing.latest_checkpoint(checkpoint_dir)
+        if path is None:
+            return None
+        meta = checkpointing.read_meta(path)
+        config = dict(meta["config"])
+        if checkpoint_every is not None:
+            config["checkpoint_every"] = checkpoint_every
+        self.train(**config, save_path=save_path, policy_path=policy_path, checkpoint_dir=checkpoint_dir,
+                   resume_from=path)
+        return meta
+
+    def train(self, episodes=10, use_baseline=True, baseline_strategy='combined', num_envs=1, num_actors=0,
+              save_path=None, trajectory_path=None, seed=None, checkpoint_dir=None, checkpoint_every=10,
+              resume_from=None, policy_path=None):
+        """Run the training loop, from scratch or from the checkpoint at resume_from (see resume())"""
+        env, agent, baseline, reward_system = self.env, self.agent, self.baseline, self.reward_system
+        config = {
+            "episodes": episodes, "use_baseline": use_baseline, "baseline_strategy": baseline_strategy,
+            "num_envs": num_envs, "num_actors": num_actors, "seed": seed, "checkpoint_every": checkpoint_every
+        }
+        checkpoint = checkpointing.load_checkpoint(resume_from) if resume_from else None
+        start_episode = checkpoint["meta"]["episode"] if checkpoint else 0
+
+        self.status.update({
+            "isTraining": True,
+            "currentEpisode": start_episode,
+            "totalEpisodes": episodes,
+            "startTime": time.time(),
+            "endTime": None
+        })
+
+        # Pre-generate seeds for reproducibility; a resumed run keeps its own.
+        # A fresh seeded run also reseeds the agent, so the whole run repeats
+        if checkpoint:
+            seeds = checkpoint["meta"]["episodeSeeds"]
+        else:
+            seed_rng = np.random.default_rng(seed)
+            seeds = seed_rng.integers(2**32, size=episodes).tolist()
+            if seed is not None:
+                agent.reseed(int(seed_rng.integers(2**32)))
+
+        self.events.start_run(start_episode)
+        if checkpoint:
+            checkpointing.restore(self, checkpoint)
+            self._update_results()
+        else:
+            reward_system.reset()
+            agent.epsilon = 1.0
+            agent.update_target_model()
+
+        if baseline.strategy != baseline_strategy:
+            baseline.strategy = baseline_strategy
+
+        # With num_envs > 1 the agent plays N copies of the market in lockstep;
+        # with num_actors > 0 worker processes play it and this thread only
+        # learns, one loop episode per batch of arrived actor episodes
+        vec_env = VectorMarketEnvironment.replicate(env, num_envs) if num_envs > 1 else None
+        actors = ActorLearner(agent, env, num_actors, seed=seed).start() if num_actors > 0 else None
+        # Actor episodes are played in other processes and are not logged
+        agent_log = baseline_log = None
+        if trajectory_path:
+            agent_log = TrajectoryWriter(os.path.join(trajectory_path, 'agent'), env.state_size, env.num_products)
+            baseline_log = TrajectoryWriter(os.path.join(trajectory_path, 'baseline'), env.state_size, env.num_products)
+
+        # Snapshots every checkpoint_every episodes and at the end, written by a background thread
+        checkpointer = checkpointing.Checkpointer(checkpoint_dir) if checkpoint_dir and checkpoint_every else None
+        checkpointed = start_episode
+        timer = PhaseTimer(self.metrics)
+        self.timings = []
+        self.metrics.gauge('training_active', 'Whether a training run is in progress').set(1)
+
+        try:
+            for ep in range(start_episode, episodes):
+                if self.cancel_event.is_set():
+                    break
+                episode_seed = seeds[ep]
+                self.status["currentEpisode"] = ep + 1
+                episode_start = time.perf_counter()
+                # Markets the agent plays this episode; the baseline plays the same ones
+                market_seeds = [episode_seed]
+
+                # 1) Agent run
+                if actors is not None:
+                    total_reward, steps, market_seeds = _run_actor_episode(agent, actors, timer)
+                elif vec_env is not None:
+                    total_reward, steps = _run_vector_episode(agent, vec_env, timer, agent_log, ep, episode_seed)
+                else:
+                    state = env.reset(seed=episode_seed)
+                    total_reward = 0
+                    done = False
+                    steps = 0
+
+                    while not done:
+                        with timer.phase('act'):
+                            action = agent.act(state)
+                        with timer.phase('env_step'):
+                            next_state, reward, done, info = env.step(action)
+                        agent.remember(state, action, reward, next_state, done)
+                        if agent_log is not None:
+                            with timer.phase('trajectory_log'):
+                                agent_log.write(
+                                    ep, steps, state, env.price_levels, env.current_prices,
+                                    info['demand'], info['revenue'], info['profit'],
+                                    info['customer_satisfaction'], next_state, done
+                                )
+                        steps += 1
+                        state = next_state
+                        total_reward += reward
+                        if len(agent.memory) > agent.batch_size:
+                            with timer.phase('replay'):
+                                agent.replay()
+
+                # 2) Baseline run, on the markets the agent just played
+                if use_baseline:
+                    with timer.phase('baseline'):
+                        if vec_env is not None and actors is None:
+                            b_reward = float(baseline.run_vector_episode(
+                                vec_env, seed=episode_seed, writer=baseline_log, episode=ep
+                            ).mean())
+                        else:
+                            b_reward = np.mean([
+                                baseline.run_episode(writer=baseline_log, episode=ep, seed=s)[0] for s in market_seeds
+                            ])
+                    reward_system.add_baseline_reward(b_reward)
+
+                reward_system.add_agent_reward(total_reward)
+
+                if (ep + 1) % 10 == 0:
+                    with timer.phase('target_sync'):
+                        agent.update_target_model()
+
+                if checkpointer is not None and (ep + 1) % checkpoint_every == 0:
+                    with timer.phase('checkpoint'):
+                        if checkpointer.save(checkpointing.capture(self, ep + 1, config, seeds)):
+                            checkpointed = ep + 1
+
+                timing = self._record_timing(ep + 1, time.perf_counter() - episode_start, steps, timer)
+
+                self._update_results()
+                agent_series, baseline_series = reward_system.agent, reward_system.baseline
+                self.events.append({
+                    "episode": ep + 1,
+                    "totalEpisodes": episodes,
+                    "reward": float(total_reward),
+                    "baselineReward": baseline_series.last() if use_baseline else None,
+                    "avgReward": agent_series.total / agent_series.count,
+                    "avgBaseline": baseline_series.total / baseline_series.count if baseline_series.count else None,
+                    "avgLast10": self.results["avgLast10"],
+                    "improvementOverBaseline": self.results["improvementOverBaseline"],
+                    "timing": timing
+                })
+
+                time.sleep(0.1)
+
+            # Final checkpoint, also when cancelled, so the run can be resumed
+            if checkpointer is not None and reward_system.agent.count > checkpointed:
+                checkpointer.save(checkpointing.capture(self, reward_system.agent.count, config, seeds), block=True)
+        finally:
+            if checkpointer is not None:
+                checkpointer.close()
+                self._record_checkpoints(checkpointer)
+            if actors is not None:
+                actors.stop()
+            for log in (agent_log, baseline_log):
+                if log is not None:
+                    log.close()
+            self.events.finish()
+            self.status.update({
+                "isTraining": False,
+                "endTime": time.time()
+            })
+            self.metrics.gauge('training_active', 'Whether a training run is in progress').set(0)
+
+        # The exported policy is served without TensorFlow by numpy_policy.NumpyPolicy
+        if save_path or policy_path:
+            with timer.phase('save'):
+                if policy_path:
+                    agent.export_policy(policy_path)
+                if save_path:
+                    agent.save(save_path)
+            timer.flush()
+
+    def _update_results(self):
+        """Refresh results from the reward system; the histories are array views, see results_payload()"""
+        reward_system = self.reward_system
+        agent_series = reward_system.agent
+        self.results.update({
+            "rewardHistory": agent_series.values(),
+            "baselineHistory": reward_system.baseline.values(),
+            "finalReward": agent_series.last(),
+            "avgLast10": agent_series.mean_last(10),
+            "improvementOverBaseline": reward_system.get_improvement_percentage()
+        })
+        self.results_version += 1
+
+    def _record_checkpoints(self, checkpointer):
+        """Publish a finished run's checkpoint writes as metrics"""
+        metrics = self.metrics
+        metrics.counter('training_checkpoints_total', 'Checkpoints written').inc(checkpointer.written)
+        metrics.counter('training_checkpoints_skipped_total',
+                        'Checkpoints skipped because the previous write was still running').inc(checkpointer.skipped)
+        if checkpointer.last_write_seconds is not None:
+            metrics.gauge('training_checkpoint_write_seconds', 'Seconds the last checkpoint write took').set(
+                checkpointer.last_write_seconds)
+
+    def _record_timing(self, episode, seconds, steps, timer):
+        """Close the episode's phase record, publish it as metrics and keep it in timings"""
+        agent, metrics = self.agent, self.metrics
+        phases = timer.flush()
+        updates = phases.get('replay', {}).get('calls', 0) * agent.gradient_steps
+        record = {
+            "episode": episode,
+            "seconds": seconds,
+            "steps": steps,
+            "updates": updates,
+            "stepsPerSec": steps / seconds if seconds else 0.0,
+            "updatesPerSec": updates / seconds if seconds else 0.0,
+            "epsilon": agent.epsilon,
+            "replaySize": len(agent.memory),
+            "phases": phases
+        }
+        self.timings.append(record)
+
+        metrics.counter('training_episodes_total', 'Training episodes completed').inc()
+        metrics.counter('training_env_steps_total', 'Environment steps taken by the agent').inc(steps)
+        metrics.counter('training_updates_total', 'Gradient updates applied').inc(updates)
+        metrics.gauge('training_episode', 'Current training episode').set(episode)
+        metrics.gauge('training_epsilon', 'Exploration rate').set(agent.epsilon)
+        metrics.gauge('training_replay_buffer_size', 'Transitions in the replay buffer').set(len(agent.memory))
+        metrics.gauge('training_replay_buffer_capacity', 'Replay buffer capacity').set(agent.memory.capacity)
+        metrics.gauge('training_steps_per_second', 'Environment steps per second in the last episode').set(record["stepsPerSec"])
+        metrics.gauge('training_updates_per_second', 'Gradient updates per second in the last episode').set(record["updatesPerSec"])
+        metrics.gauge('training_episode_seconds', 'Wall-clock seconds of the last episode').set(seconds)
+        return record
+
+
+def _run_vector_episode(agent, vec_env, timer, writer=None, episode=0, seed=None):
+    """Play one episode on every market of vec_env.
+
+    Returns the mean total reward and the number of environment steps taken.
+    """
+    states = vec_env.reset(seed=seed)
+    totals = np.zeros(vec_env.num_envs)
+    done = False
+    step = 0
+
+    while not done:
+        with timer.phase('act'):
+            actions = agent.act_batch(states)
+        with timer.phase('env_step'):
+            next_states, rewards, dones, infos = vec_env.step(actions)
+        agent.remember_batch(states, actions, rewards, next_states, dones)
+        if writer is not None:
+            with timer.phase('trajectory_log'):
+                writer.write(
+                    episode, step, states, vec_env.price_levels, vec_env.current_prices,
+                    infos['demand'], infos['revenue'], infos['profit'], infos['customer_satisfaction'],
+                    next_states, dones
+                )
+        step += 1
+        states = next_states
+        totals += rewards
+        done = bool(dones.all())
+        if len(agent.memory) > agent.batch_size:
+            with timer.phase('replay'):
+                agent.replay()
+
+    return float(totals.mean()), step * vec_env.num_envs
+
+
+def _run_actor_episode(agent, actors, timer):
+    """Learn from every actor episode that has arrived, waiting for at least one.
+
+    Returns their mean total reward, their number of environment steps and
+    the market seeds they were played on.
+    """
+    with timer.phase('collect'):
+        episodes = actors.collect()
+    steps = sum(len(episode['rewards']) for episode in episodes)
+    # Keep the serial loop's ratio of one update per environment step
+    for _ in range(steps):
+        if len(agent.memory) > agent.batch_size:
+            with timer.phase('replay'):
+                agent.replay()
+    with timer.phase('weight_sync'):
+        actors.sync()
+    total_reward = float(np.mean([episode['total_reward'] for episode in episodes]))
+    return total_reward, steps, [episode['seed'] for episode in episodes]
@@ -0,0 +1,64 @@
+import json
+import threading
+
+
+class TrainingEventLog:
+    """Append-only log of per-episode training events that readers can block on.
+
+    Each event is JSON-encoded once when it is appended, so any number of
+    streaming clients can replay it without re-serializing. Event ids are
+    the 1-based episode numbers of the current run; a resumed run's log
+    starts after the episode it resumed from.
+    """
+
+    def __init__(self):
+        self._events = []
+        self._cond = threading.Condition()
+        self.run_id = 0
+        # Episode number of the event before the first one in the log
+        self.first_episode = 0
+        # No run has started yet, so there is nothing to finish: idle readers
+        # keep waiting for the first run instead of being told it is done
+        self.finished = False
+
+    def start_run(self, first_episode=0):
+        """Clear the log for a new training run whose next episode follows first_episode, and wake waiting readers"""
+        with self._cond:
+            self._events = []
+            self.first_episode = first_episode
+            self.run_id += 1
+            self.finished = False
+            self._cond.notify_all()
+
+    def append(self, event):
+        """Record one finished episode"""
+        with self._cond:
+            self._events.append(json.dumps(event))
+            self._cond.notify_all()
+
+    def finish(self):
+        """Mark the current run as complete"""
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
+
+    def wait_for(self, run_id, cursor, timeout=None, seen_finish=False):
+        """Wait for events after cursor in run run_id.
+
+        cursor is the id of the last event seen. Returns (run_id,
+        [(event_id, payload), ...], finished). If a new run has started
+        since run_id, its events are returned from the start. The end of
+        the run also wakes the caller, unless seen_finish says it already
+        knows; it then only wakes for new events or a new run.
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self.run_id != run_id or self.first_episode + len(self._events) > cursor
+                or (self.finished and not seen_finish),
+                timeout
+            )
+            if self.run_id != run_id:
+                cursor = 0
+            start = max(cursor - self.first_episode, 0)
+            events = list(enumerate(self._events[start:], start=self.first_episode + start + 1))
+            return self.run_id, events, self.finished
@@ -0,0 +1,140 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TrainingJob:
+    """A queued, running or finished training configuration.
+
+    run is the job's TrainingRun while it runs; when the job finishes only
+    its results payload and final status are kept, so its models and replay
+    buffer can be freed.
+    """
+
+    def __init__(self, job_id, config):
+        self.id = job_id
+        self.config = config
+        self.state = 'queued'  # queued, running, completed, cancelled or failed
+        self.error = None
+        self.run = None
+        self.results = None
+        self.status = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancelled = False
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "state": self.state,
+            "config": self.config,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "status": dict(self.run.status) if self.run else self.status
+        }
+
+    def results_payload(self):
+        """The run's results, live while it runs and as kept when it finished"""
+        run = self.run
+        if run is not None:
+            return run.results_payload()
+        return self.results or {}
+
+    def _release(self):
+        """Keep the finished run's results and status and drop the run itself"""
+        run = self.run
+        if run is not None:
+            self.results = run.results_payload()
+            self.status = dict(run.status)
+        self.run = None
+
+
+class TrainingJobManager:
+    """Runs training jobs on a bounded worker pool with a bounded queue.
+
+    make_run(config) must return a TrainingRun with its own environment,
+    agent, baseline and reward system; it is called on the worker thread
+    when the job starts, so queued jobs hold no models. config is passed to
+    TrainingRun.train as keyword arguments. Only the newest max_finished
+    finished jobs are kept.
+    """
+
+    def __init__(self, make_run, max_workers=2, max_queued=8, max_finished=50):
+        self.make_run = make_run
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='training-job')
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, config):
+        """Queue a job; returns None when the queue is full"""
+        with self._lock:
+            queued = sum(1 for j in self._jobs.values() if j.state == 'queued')
+            if queued >= self.max_queued:
+                return None
+            job = TrainingJob(str(next(self._ids)), config)
+            self._jobs[job.id] = job
+        self._executor.submit(self._run_job, job)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def list(self):
+        return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """Cancel a queued job or stop a running one after its current episode"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            job._cancelled = True
+            if job.state == 'queued':
+                job.state = 'cancelled'
+                job.finished_at = time.time()
+                self._evict_finished()
+            elif job.run is not None:
+                job.run.cancel()
+        return job
+
+    def _run_job(self, job):
+        with self._lock:
+            if job._cancelled:
+                return
+            job.state = 'running'
+            job.started_at = time.time()
+        try:
+            run = self.make_run(job.config)
+            with self._lock:
+                job.run = run
+                if job._cancelled:
+                    run.cancel()
+            run.train(**job.config)
+            job.state = 'cancelled' if run.cancel_event.is_set() else 'completed'
+        except Exception as e:
+            job.state = 'failed'
+            job.error = str(e)
+        finally:
+            with self._lock:
+                job._release()
+                job.finished_at = time.time()
+                self._evict_finished()
+
+    def _evict_finished(self):
+        """Forget the oldest finished jobs beyond max_finished; call with the lock held"""
+        finished = sorted((j for j in self._jobs.values() if j.finished_at is not None), key=lambda j: j.finished_at)
+        for job in finished[:max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job.id]
+
+    def shutdown(self):
+        for job in self.list():
+            self.cancel(job.id)
+        self._executor.shutdown(wait=False)
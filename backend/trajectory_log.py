@@ -0,0 +1,143 @@
+import json
+import os
+
+import numpy as np
+
+
+def _columns(state_size, num_products):
+    """(dtype, per-row shape) of every logged column"""
+    return {
+        'episode': (np.int32, ()),
+        'step': (np.int32, ()),
+        'market': (np.int32, ()),
+        'state': (np.float32, (state_size,)),
+        'action': (np.int8, (num_products,)),
+        'prices': (np.float32, (num_products,)),
+        'demand': (np.int32, (num_products,)),
+        'revenue': (np.float64, ()),
+        'profit': (np.float64, ()),
+        'satisfaction': (np.float32, ()),
+        'next_state': (np.float32, (state_size,)),
+        'done': (np.bool_, ()),
+    }
+
+
+class TrajectoryWriter:
+    """Buffered, chunked columnar log of environment steps.
+
+    Rows are copied into fixed-size preallocated column buffers; every
+    chunk_size rows the buffers are written to path/chunk_NNNNN/<column>.npy
+    and reused, so memory stays constant however long the run. Chunks are
+    written under a temporary name and renamed into place, so readers only
+    ever see complete chunks.
+    """
+
+    def __init__(self, path, state_size, num_products, chunk_size=4096):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.columns = _columns(state_size, num_products)
+        self._buffers = {
+            name: np.empty((chunk_size,) + shape, dtype=dtype)
+            for name, (dtype, shape) in self.columns.items()
+        }
+        self._count = 0
+        self.num_chunks = 0
+        self.rows = 0
+        os.makedirs(path, exist_ok=True)
+        self._write_meta(state_size, num_products)
+
+    def write(self, episode, step, states, actions, prices, demand, revenue, profit, satisfaction,
+              next_states, dones):
+        """Log one step of one market or of N markets (arrays with a leading N axis).
+
+        actions are per-product price-level indices.
+        """
+        states = np.asarray(states).reshape(-1, self.columns['state'][1][0])
+        n = len(states)
+        rows = {
+            'episode': np.full(n, episode),
+            'step': np.full(n, step),
+            'market': np.arange(n),
+            'state': states,
+            'action': np.reshape(actions, (n, -1)),
+            'prices': np.reshape(prices, (n, -1)),
+            'demand': np.reshape(demand, (n, -1)),
+            'revenue': np.reshape(revenue, n),
+            'profit': np.reshape(profit, n),
+            'satisfaction': np.reshape(satisfaction, n),
+            'next_state': np.reshape(next_states, (n, -1)),
+            'done': np.reshape(dones, n),
+        }
+        start = 0
+        while start < n:
+            take = min(n - start, self.chunk_size - self._count)
+            for name, values in rows.items():
+                self._buffers[name][self._count:self._count + take] = values[start:start + take]
+            self._count += take
+            start += take
+            if self._count == self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        """Write the buffered rows as a chunk"""
+        if not self._count:
+            return
+        name = f"chunk_{self.num_chunks:05d}"
+        tmp = os.path.join(self.path, f".{name}.tmp")
+        os.makedirs(tmp, exist_ok=True)
+        for column, buf in self._buffers.items():
+            np.save(os.path.join(tmp, f"{column}.npy"), buf[:self._count])
+        os.replace(tmp, os.path.join(self.path, name))
+        self.num_chunks += 1
+        self.rows += self._count
+        self._count = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_meta(self, state_size, num_products):
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump({"stateSize": state_size, "numProducts": num_products, "chunkSize": self.chunk_size}, f)
+
+
+class TrajectoryReader:
+    """Read the chunks written by a TrajectoryWriter as memory-mapped arrays"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.state_size = meta['stateSize']
+        self.num_products = meta['numProducts']
+        self.columns = list(_columns(self.state_size, self.num_products))
+
+    def chunk_paths(self):
+        """Directories of the complete chunks, in write order"""
+        return sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.startswith('chunk_')
+        )
+
+    def read_chunk(self, chunk_path, columns=None):
+        """Dict of memory-mapped column arrays for one chunk"""
+        return {
+            name: np.load(os.path.join(chunk_path, f"{name}.npy"), mmap_mode='r')
+            for name in (columns or self.columns)
+        }
+
+    def __iter__(self):
+        for chunk_path in self.chunk_paths():
+            yield self.read_chunk(chunk_path)
+
+    def load(self, columns=None):
+        """Concatenate every chunk into in-memory column arrays"""
+        chunks = [self.read_chunk(p, columns) for p in self.chunk_paths()]
+        if not chunks:
+            return {}
+        return {name: np.concatenate([c[name] for c in chunks]) for name in chunks[0]}